@@ -0,0 +1,104 @@
+# Benchmark: wire bytes and CPU per getresumedata response, cached/spliced compression against the
+# uncompressed path it replaced (and against gzipping the whole body on every request).
+#
+#   python bench/compression.py [resume.json] [--requests N]
+#
+# Without a file a synthetic JSON Resume of about 90 KB is used.
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tests.snapshot_env import use_snapshot_mode  # noqa: E402
+
+use_snapshot_mode()
+
+import azure.functions as func  # noqa: E402
+import function_app  # noqa: E402
+
+
+# Function to build a resume from seeded random prose, so it compresses like real text rather than
+# like one repeated sentence (which deflate handles unrealistically fast)
+def synthetic_resume():
+    rng = random.Random(42)
+    words = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 10))) for _ in range(3000)]
+
+    def prose(count):
+        return ' '.join(rng.choice(words) for _ in range(count)).capitalize() + '.'
+
+    return {
+        'basics': {'name': 'Jane Doe', 'label': 'Cloud Engineer', 'summary': prose(80)},
+        'work': [{
+            'name': prose(2),
+            'position': prose(2),
+            'startDate': f'{2000 + i % 24}-0{1 + i % 9}-01',
+            'summary': prose(40),
+            'highlights': [prose(15) for _ in range(6)]
+        } for i in range(60)],
+        'skills': [{'name': prose(1), 'keywords': [prose(1) for _ in range(5)]} for _ in range(40)],
+        'education': [{'institution': prose(3), 'area': 'Computer Science', 'studyType': 'BSc'}]
+    }
+
+
+# Function to run one response path, prints wire bytes and CPU per request and returns the CPU.
+# Every path serializes the envelope, so the cost over the uncompressed path is what compression adds
+def measure(label, respond, requests, baseline=None, repeats=5):
+    cpu = float('inf')
+    for _ in range(repeats):
+        sizes = 0
+        started = time.process_time()
+        for count in range(requests):
+            sizes += len(respond(count))
+        cpu = min(cpu, (time.process_time() - started) / requests)
+    extra = '' if baseline is None else f'{(cpu - baseline) * 1e6:>+14.1f}'
+    print(f'{label:<34} {sizes // requests:>10} {cpu * 1e6:>12.1f}{extra}')
+    return cpu
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('resume', nargs='?')
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    if args.resume:
+        with open(args.resume, encoding='utf-8') as resume_file:
+            resume = json.load(resume_file)
+    else:
+        resume = synthetic_resume()
+    data = function_app.project_resume(resume)
+    request = func.HttpRequest(method='GET', url='http://localhost/api/getresumedata', body=b'',
+                               headers={'accept-encoding': 'gzip, deflate, br'})
+
+    # Every request carries a new timestamp and count, as in production
+    def envelope(count):
+        return function_app.build_envelope(count, data)
+
+    def uncompressed(count):
+        return json.dumps(envelope(count), indent=4).encode()
+
+    def gzip_every_request(count):
+        return gzip.compress(uncompressed(count), compresslevel=6)
+
+    def cached_splice(count):
+        head, body, tail = function_app.encode_envelope(envelope(count))
+        return function_app.compressed_response(request, ('bench',), body, 'application/json', head=head, tail=tail).get_body()
+
+    # The spliced output must be a valid gzip stream of the exact uncompressed body
+    sample = function_app.build_envelope(1, data)
+    head, body, tail = function_app.encode_envelope(sample)
+    assert gzip.decompress(function_app.compressed_response(request, ('check',), body, 'application/json', head=head, tail=tail).get_body()) \
+        == json.dumps(sample, indent=4).encode()
+
+    print(f'{"path":<34} {"wire bytes":>10} {"CPU us/req":>12} {"vs previous":>14}')
+    baseline = measure('uncompressed (previous path)', uncompressed, args.requests)
+    measure('gzip whole body per request', gzip_every_request, args.requests, baseline)
+    measure('cached deflate + spliced gzip', cached_splice, args.requests, baseline)
+
+
+if __name__ == '__main__':
+    main()
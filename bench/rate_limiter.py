@@ -0,0 +1,46 @@
+# Benchmark: per-request overhead of the rate limiter, which must stay in the microseconds.
+#
+#   python bench/rate_limiter.py [--requests N]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tests.snapshot_env import use_snapshot_mode  # noqa: E402
+
+use_snapshot_mode()
+
+import function_app  # noqa: E402
+from function_app import RateLimiter, client_key  # noqa: E402
+
+
+def measure(label, call, requests):
+    started = time.perf_counter()
+    for count in range(requests):
+        call(count)
+    print(f'{label:<44} {(time.perf_counter() - started) / requests * 1e6:>8.2f} us')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200000)
+    args = parser.parse_args()
+
+    # Generous limits, so every call takes the allowed path that real traffic takes
+    hot = RateLimiter(1e9, 10 ** 9, 10000)
+    measure('acquire, one hot client', lambda count: hot.acquire('203.0.113.7'), args.requests)
+
+    full = RateLimiter(1e9, 10 ** 9, 10000)
+    measure('acquire, new client each call (LRU evicting)', lambda count: full.acquire(f'10.{count >> 16 & 255}.{count >> 8 & 255}.{count & 255}'), args.requests)
+
+    headers = {'x-client-ip': '203.0.113.7:51234', 'x-forwarded-for': '198.51.100.1, 203.0.113.7:51234'}
+    limiter = RateLimiter(1e9, 10 ** 9, 10000)
+    measure('client_key + acquire (request path)', lambda count: limiter.acquire(client_key(headers)), args.requests)
+
+    function_app.rate_limiter = RateLimiter(1e9, 10 ** 9, 10000)
+    measure('rate_limit_wait (as called by routes)', lambda count: function_app.rate_limit_wait(headers), args.requests)
+
+
+if __name__ == '__main__':
+    main()
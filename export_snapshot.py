@@ -0,0 +1,40 @@
+# Dumps every document in the resume container to a gzip-compressed JSONL snapshot,
+# one document per line, for RESUME_DATA_SOURCE=snapshot (local runs, load tests and
+# the emergency read-only mode).
+#
+# Usage: python export_snapshot.py [output_path]
+# Reads the same COSMOS_DB_* environment variables as the function app.
+import gzip
+import json
+import logging
+import os
+import sys
+from azure.cosmos import CosmosClient
+
+def export_snapshot(container, output_path):
+    count = 0
+    temporary_path = output_path + '.tmp'
+    with gzip.open(temporary_path, 'wt', encoding='utf-8') as snapshot:
+        for document in container.read_all_items():
+            # Keep _etag and _ts so snapshot documents carry their version, drop the rest of the metadata
+            for key in ('_rid', '_self', '_attachments'):
+                document.pop(key, None)
+            snapshot.write(json.dumps(document, separators=(',', ':'), ensure_ascii=False))
+            snapshot.write('\n')
+            count += 1
+    os.replace(temporary_path, output_path)
+    return count
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    output_path = sys.argv[1] if len(sys.argv) > 1 else 'resume-snapshot.jsonl.gz'
+
+    client = CosmosClient(os.environ['COSMOS_DB_ENDPOINT'], credential=os.environ['COSMOS_DB_KEY'])
+    database = client.get_database_client(os.environ['COSMOS_DB_DATABASE'])
+    container = database.get_container_client(os.environ['COSMOS_DB_CONTAINER'])
+
+    count = export_snapshot(container, output_path)
+    logging.info(f'Wrote {count} documents to {output_path}')
+
+if __name__ == '__main__':
+    main()
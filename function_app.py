@@ -1,1193 +1,2357 @@
 import azure.functions as func
+import asyncio
+import contextlib
+import cProfile
+import contextvars
 import logging
 import os
+import random
+import re
 from azure.cosmos import CosmosClient, exceptions
-from datetime import datetime
+from azure.core.pipeline.transport import RequestsTransport
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Optional
+import jsonschema
+import requests
+from urllib3.util.retry import Retry
+import gzip
+import hashlib
+import hmac
 import json
+import math
+import mmap
+import pstats
+import shutil
+import tempfile
+import struct
+import threading
+import time
+import weakref
+import zlib
+
+# Brotli is optional, without it responses are only offered gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# fcntl only exists on POSIX, without it (local runs on Windows) the shared cache is off
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# OpenTelemetry is optional, without it tracing is a no-op
+try:
+    from opentelemetry import propagate, trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor, SpanExporter, SpanExportResult
+except ImportError:
+    trace = None
 
 # Environment variables
-COSMOS_DB_ENDPOINT = os.environ['COSMOS_DB_ENDPOINT']
-COSMOS_DB_KEY = os.environ['COSMOS_DB_KEY']
-COSMOS_DB_DATABASE = os.environ['COSMOS_DB_DATABASE']
-COSMOS_DB_CONTAINER = os.environ['COSMOS_DB_CONTAINER']
+DATA_SOURCE = os.environ.get('RESUME_DATA_SOURCE', 'cosmos').lower()
+SNAPSHOT_PATH = os.environ.get('RESUME_SNAPSHOT_PATH', 'resume-snapshot.jsonl.gz')
+if DATA_SOURCE not in ('cosmos', 'snapshot'):
+    raise ValueError(f'Unknown RESUME_DATA_SOURCE {DATA_SOURCE!r}, expected cosmos or snapshot')
+# The Cosmos settings are only required when serving from Cosmos
+COSMOS_DB_ENDPOINT = os.environ['COSMOS_DB_ENDPOINT'] if DATA_SOURCE == 'cosmos' else os.environ.get('COSMOS_DB_ENDPOINT')
+COSMOS_DB_KEY = os.environ['COSMOS_DB_KEY'] if DATA_SOURCE == 'cosmos' else os.environ.get('COSMOS_DB_KEY')
+COSMOS_DB_DATABASE = os.environ['COSMOS_DB_DATABASE'] if DATA_SOURCE == 'cosmos' else os.environ.get('COSMOS_DB_DATABASE')
+COSMOS_DB_CONTAINER = os.environ['COSMOS_DB_CONTAINER'] if DATA_SOURCE == 'cosmos' else os.environ.get('COSMOS_DB_CONTAINER')
+STREAMING_ENABLED = os.environ.get('RESUME_STREAMING_ENABLED', 'false').lower() == 'true'
+COUNT_STREAM_INTERVAL_SECONDS = float(os.environ.get('COUNT_STREAM_INTERVAL_SECONDS', '5'))
+COUNT_STREAM_MAX_CLIENTS = int(os.environ.get('COUNT_STREAM_MAX_CLIENTS', '200'))
+COUNT_STREAM_MAX_SECONDS = float(os.environ.get('COUNT_STREAM_MAX_SECONDS', '300'))
+RATE_LIMIT_PER_MINUTE = float(os.environ.get('RATE_LIMIT_PER_MINUTE', '60'))
+RATE_LIMIT_BURST = int(os.environ.get('RATE_LIMIT_BURST', '20'))
+RATE_LIMIT_MAX_CLIENTS = int(os.environ.get('RATE_LIMIT_MAX_CLIENTS', '10000'))
+BREAKER_WINDOW = int(os.environ.get('BREAKER_WINDOW', '20'))
+BREAKER_MIN_CALLS = int(os.environ.get('BREAKER_MIN_CALLS', '5'))
+BREAKER_FAILURE_RATE = float(os.environ.get('BREAKER_FAILURE_RATE', '0.5'))
+BREAKER_SLOW_CALL_SECONDS = float(os.environ.get('BREAKER_SLOW_CALL_SECONDS', '2'))
+BREAKER_OPEN_SECONDS = float(os.environ.get('BREAKER_OPEN_SECONDS', '30'))
+BACKGROUND_REFRESH_SECONDS = float(os.environ.get('BACKGROUND_REFRESH_SECONDS', '60'))
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSION_CACHE_SIZE = int(os.environ.get('COMPRESSION_CACHE_SIZE', '128'))
+ANALYTICS_FLUSH_SECONDS = float(os.environ.get('ANALYTICS_FLUSH_SECONDS', '60'))
+VISITOR_COUNT_MAX_STALENESS_SECONDS = float(os.environ.get('VISITOR_COUNT_MAX_STALENESS_SECONDS', '5'))
+DELTA_HISTORY_VERSIONS = int(os.environ.get('DELTA_HISTORY_VERSIONS', '8'))
+EDGE_CACHE_MAX_AGE_SECONDS = int(os.environ.get('EDGE_CACHE_MAX_AGE_SECONDS', '60'))
+EDGE_CACHE_SHARED_MAX_AGE_SECONDS = int(os.environ.get('EDGE_CACHE_SHARED_MAX_AGE_SECONDS', '86400'))
+EDGE_PURGE_URL = os.environ.get('EDGE_PURGE_URL')
+VISITOR_DEDUP_WINDOW_SECONDS = float(os.environ.get('VISITOR_DEDUP_WINDOW_SECONDS', '1800'))
+VISITOR_DEDUP_CAPACITY = int(os.environ.get('VISITOR_DEDUP_CAPACITY', '10000'))
+VISITOR_DEDUP_ERROR_RATE = float(os.environ.get('VISITOR_DEDUP_ERROR_RATE', '0.01'))
+SHARED_CACHE_SECONDS = float(os.environ.get('SHARED_CACHE_SECONDS', '5'))
+SHARED_CACHE_SLOTS = int(os.environ.get('SHARED_CACHE_SLOTS', '64'))
+SHARED_CACHE_SLOT_BYTES = int(os.environ.get('SHARED_CACHE_SLOT_BYTES', str(256 * 1024)))
+ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', '8'))
+ADMISSION_MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE', '16'))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT_SECONDS', '2'))
+INGEST_CONCURRENCY = int(os.environ.get('INGEST_CONCURRENCY', '4'))
+INGEST_MAX_BYTES = int(os.environ.get('INGEST_MAX_BYTES', str(2 * 1024 * 1024)))
+HEDGE_READS_ENABLED = os.environ.get('HEDGE_READS_ENABLED', 'false').lower() == 'true'
+HEDGE_PERCENTILE = float(os.environ.get('HEDGE_PERCENTILE', '0.95'))
+HEDGE_MIN_DELAY_MS = float(os.environ.get('HEDGE_MIN_DELAY_MS', '20'))
+HEDGE_BUDGET_RATIO = float(os.environ.get('HEDGE_BUDGET_RATIO', '0.05'))
+REQUEST_DEADLINE_SECONDS = float(os.environ.get('REQUEST_DEADLINE_SECONDS', '10'))
+REQUEST_DEADLINE_RESERVE_SECONDS = float(os.environ.get('REQUEST_DEADLINE_RESERVE_SECONDS', '1'))
+LOG_MAX_FIELD_CHARS = int(os.environ.get('LOG_MAX_FIELD_CHARS', '256'))
+PROFILING_KEY = os.environ.get('PROFILING_KEY')
+
+# Share of each log event that is emitted. Per-request events are sampled by default;
+# anything not listed is always logged. LOG_SAMPLE_RATES overrides, e.g. "request=1,resume_found=0.01"
+LOG_SAMPLE_RATES = {'request': 0.1, 'resume_found': 0.1}
+for entry in os.environ.get('LOG_SAMPLE_RATES', '').split(','):
+    if '=' in entry:
+        event_name, rate = entry.split('=', 1)
+        LOG_SAMPLE_RATES[event_name.strip()] = float(rate)
+
+logger = logging.getLogger('resume_api')
+
+TRACING_EXPORTER = os.environ.get('TRACING_EXPORTER', 'none').lower()
+TRACING_FILE_PATH = os.environ.get('TRACING_FILE_PATH', os.path.join(tempfile.gettempdir(), 'resume-api-spans.jsonl'))
+
+# Correlation fields (invocation id, trace parent) attached to every event logged by the current request
+request_context = contextvars.ContextVar('request_context', default={})
+
+# Monotonic time by which the current request must be answered, None outside requests (background work)
+request_deadline = contextvars.ContextVar('request_deadline', default=None)
+
+class DeadlineExceededError(Exception):
+    pass
+
+# Function to return the seconds left before the request deadline, None when there is none
+def remaining_budget():
+    deadline = request_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+# Function to tell whether optional work (the counter update) still fits before the deadline
+def budget_allows_optional_work():
+    remaining = remaining_budget()
+    return remaining is None or remaining > REQUEST_DEADLINE_RESERVE_SECONDS
+
+# A structured log record, serialized to JSON only if a handler actually emits it
+class LogEvent:
+    def __init__(self, event, fields):
+        self.event = event
+        self.fields = fields
+
+    def __str__(self):
+        record = {'event': self.event}
+        record.update(request_context.get())
+        for key, value in self.fields.items():
+            if not isinstance(value, (int, float, bool, type(None))):
+                value = str(value)
+                if len(value) > LOG_MAX_FIELD_CHARS:
+                    value = value[:LOG_MAX_FIELD_CHARS] + f'...({len(value)} chars)'
+            record[key] = value
+        return json.dumps(record, ensure_ascii=False)
+
+# Function to log a structured event, sampled per event name and formatted lazily
+def log_event(level, event, **fields):
+    if not logger.isEnabledFor(level):
+        return
+    rate = LOG_SAMPLE_RATES.get(event, 1.0)
+    if rate < 1.0 and random.random() >= rate:
+        return
+    logger.log(level, '%s', LogEvent(event, fields))
+
+if trace is not None:
+    # Writes finished spans as JSON lines, for local runs and tests
+    class FileSpanExporter(SpanExporter):
+        def __init__(self, path):
+            self.path = path
+            self.lock = threading.Lock()
+
+        def export(self, spans):
+            lines = ''.join(span.to_json(indent=None) + '\n' for span in spans)
+            with self.lock, open(self.path, 'a', encoding='utf-8') as spans_file:
+                spans_file.write(lines)
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            pass
+
+# Function to build the span processor for TRACING_EXPORTER (none, console, file or otlp)
+def build_span_processor(exporter_name):
+    if exporter_name == 'console':
+        return SimpleSpanProcessor(ConsoleSpanExporter())
+    if exporter_name == 'file':
+        return SimpleSpanProcessor(FileSpanExporter(TRACING_FILE_PATH))
+    if exporter_name == 'otlp':
+        # Needs opentelemetry-exporter-otlp-proto-http, configured through the standard OTEL_EXPORTER_OTLP_* settings
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return BatchSpanProcessor(OTLPSpanExporter())
+    raise ValueError(f'Unknown TRACING_EXPORTER {exporter_name!r}, expected none, console, file or otlp')
+
+tracer = None
+if TRACING_EXPORTER != 'none':
+    if trace is None:
+        log_event(logging.WARNING, 'tracing_unavailable', exporter=TRACING_EXPORTER, reason='opentelemetry-sdk is not installed')
+    else:
+        tracer_provider = TracerProvider(resource=Resource.create({'service.name': 'azure-resume-api'}))
+        tracer_provider.add_span_processor(build_span_processor(TRACING_EXPORTER))
+        tracer = tracer_provider.get_tracer('resume_api')
+
+# Stage timings of the request being profiled, None for every other request
+profile_stages = contextvars.ContextVar('profile_stages', default=None)
+
+# Function to open a span around one stage of a request, a no-op when tracing and profiling are off
+def span(name, **attributes):
+    if profile_stages.get() is not None:
+        return profiled_span(name, attributes)
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+# Span that also records its stage path and wall time for the profile of the current request
+@contextlib.contextmanager
+def profiled_span(name, attributes):
+    stages = profile_stages.get()
+    stages['stack'].append(name)
+    path = ';'.join(stages['stack'])
+    started = time.perf_counter()
+    try:
+        with tracer.start_as_current_span(name, attributes=attributes) if tracer is not None else contextlib.nullcontext() as current:
+            yield current
+    finally:
+        stages['timings'].append((path, time.perf_counter() - started))
+        stages['stack'].pop()
+
+# Function to open the root span of a request, continuing the caller's trace from its traceparent header
+def request_span(name, headers, **attributes):
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.start_as_current_span(name, context=propagate.extract(dict(headers)), kind=trace.SpanKind.SERVER, attributes=attributes)
+
+# Cosmos response hook adding each response's RU charge to the current span
+def record_request_charge(headers, *_):
+    current = trace.get_current_span()
+    charge = float(headers.get('x-ms-request-charge', 0) or 0)
+    total = (getattr(current, 'attributes', None) or {}).get('db.cosmosdb.request_charge', 0.0)
+    current.set_attribute('db.cosmosdb.request_charge', total + charge)
+
+CONSISTENCY_LEVELS = ('Strong', 'BoundedStaleness', 'Session', 'ConsistentPrefix', 'Eventual')
+
+# Tunable Cosmos client profile, read from app settings once at startup
+@dataclass(frozen=True)
+class CosmosSettings:
+    consistency_level: Optional[str] = None       # client default, None keeps the account level
+    read_consistency_level: Optional[str] = None  # relaxed level for resume reads only
+    preferred_regions: tuple = ()
+    pool_size: int = 10
+    connection_timeout: float = 5.0
+    operation_timeout: float = 10.0
+    retry_total: int = 3
+    retry_backoff_max: int = 5
+    retry_fixed_interval_ms: Optional[int] = None
+
+    @classmethod
+    def from_env(cls, environ=os.environ):
+        def number(name, default, cast):
+            value = environ.get(name)
+            return default if value in (None, '') else cast(value)
+
+        settings = cls(
+            consistency_level=environ.get('COSMOS_CONSISTENCY_LEVEL') or None,
+            read_consistency_level=environ.get('COSMOS_READ_CONSISTENCY_LEVEL') or None,
+            preferred_regions=tuple(r.strip() for r in environ.get('COSMOS_PREFERRED_REGIONS', '').split(',') if r.strip()),
+            pool_size=number('COSMOS_POOL_SIZE', cls.pool_size, int),
+            connection_timeout=number('COSMOS_CONNECTION_TIMEOUT', cls.connection_timeout, float),
+            operation_timeout=number('COSMOS_OPERATION_TIMEOUT', cls.operation_timeout, float),
+            retry_total=number('COSMOS_RETRY_TOTAL', cls.retry_total, int),
+            retry_backoff_max=number('COSMOS_RETRY_BACKOFF_MAX', cls.retry_backoff_max, int),
+            retry_fixed_interval_ms=number('COSMOS_RETRY_FIXED_INTERVAL_MS', None, int),
+        )
+        for level in (settings.consistency_level, settings.read_consistency_level):
+            if level is not None and level not in CONSISTENCY_LEVELS:
+                raise ValueError(f'Unknown Cosmos consistency level {level!r}, expected one of {", ".join(CONSISTENCY_LEVELS)}')
+        # A request can only relax the client level; CONSISTENCY_LEVELS runs strongest to weakest
+        if settings.consistency_level and settings.read_consistency_level and \
+                CONSISTENCY_LEVELS.index(settings.read_consistency_level) < CONSISTENCY_LEVELS.index(settings.consistency_level):
+            raise ValueError(f'COSMOS_READ_CONSISTENCY_LEVEL {settings.read_consistency_level!r} must not be stronger '
+                             f'than COSMOS_CONSISTENCY_LEVEL {settings.consistency_level!r}')
+        # The SDK treats retry_total=0 as unset and falls back to its own default of 9 retries
+        if settings.retry_total < 1:
+            raise ValueError('COSMOS_RETRY_TOTAL must be at least 1; the Cosmos SDK ignores 0 and retries with its default')
+        return settings
+
+    # Keyword arguments for CosmosClient
+    def client_kwargs(self):
+        # Own the HTTP session so the connection pool can be sized; retries stay with the Cosmos retry policy
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=Retry(total=False, redirect=False, raise_on_status=False)
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        kwargs = {
+            'transport': RequestsTransport(session=session, session_owner=False),
+            'connection_timeout': self.connection_timeout,
+            'retry_total': self.retry_total,
+            'retry_backoff_max': self.retry_backoff_max,
+        }
+        if self.consistency_level:
+            kwargs['consistency_level'] = self.consistency_level
+        if self.preferred_regions:
+            kwargs['preferred_locations'] = list(self.preferred_regions)
+        if self.retry_fixed_interval_ms is not None:
+            kwargs['retry_fixed_interval'] = self.retry_fixed_interval_ms
+        return kwargs
+
+cosmos_settings = CosmosSettings.from_env()
+
+# Read-only document store over a JSONL snapshot written by export_snapshot.py.
+# The file is memory-mapped and only a byte-range index keyed by (id, lang) is kept in memory,
+# documents are parsed on demand. Gzipped snapshots are unpacked once into the temp directory
+# because compressed data cannot be mapped (wwwroot is read-only on Azure anyway)
+class SnapshotStore:
+    def __init__(self, path):
+        if path.endswith('.gz'):
+            plain_path = os.path.join(tempfile.gettempdir(), os.path.basename(path)[:-3])
+            if not os.path.exists(plain_path) or os.path.getmtime(plain_path) < os.path.getmtime(path):
+                # Every worker process may unpack at once, so each writes its own temp file and the
+                # atomic rename leaves one complete copy whichever process finishes last
+                descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(plain_path), suffix='.tmp')
+                try:
+                    with gzip.open(path, 'rb') as source, os.fdopen(descriptor, 'wb') as target:
+                        shutil.copyfileobj(source, target)
+                    os.replace(temp_path, plain_path)
+                except BaseException:
+                    with contextlib.suppress(OSError):
+                        os.remove(temp_path)
+                    raise
+            path = plain_path
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b''
+        self.index = {}
+        start = 0
+        while start < len(self.data):
+            end = self.data.find(b'\n', start)
+            if end == -1:
+                end = len(self.data)
+            if end > start:
+                document = json.loads(self.data[start:end])
+                self.index[(document.get('id'), document.get('lang'))] = (start, end)
+            start = end + 1
+        log_event(logging.INFO, 'snapshot_loaded', path=path, documents=len(self.index))
+
+    def get(self, document_id, lang=None):
+        span = self.index.get((document_id, lang))
+        if span is None:
+            return None
+        return json.loads(self.data[span[0]:span[1]])
+
+# Read cache shared by every worker process on a host (FUNCTIONS_WORKER_PROCESS_COUNT > 1), kept in a
+# memory-mapped file of fixed-size slots. A slot holds one document, addressed by a hash of its key.
+# Writers take an exclusive flock and bracket each write with an odd sequence number. Readers take
+# no lock: they retry when the sequence is odd or moved while copying, and check the payload digest
+class SharedResumeCache:
+    HEADER = struct.Struct('<Qdi16s16s64s')  # sequence, stored at, length, key digest, payload digest, _etag
+
+    def __init__(self, path, slots, slot_bytes):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        size = slots * slot_bytes
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self.fd).st_size < size:
+                os.ftruncate(self.fd, size)
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        self.map = mmap.mmap(self.fd, size)
+        # Documents this process already decoded, by slot offset, reused while the sequence is unchanged
+        self.decoded = {}
+
+    def locate(self, key):
+        digest = hashlib.blake2b(json.dumps(key).encode(), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little') % self.slots * self.slot_bytes, digest
+
+    # Function to read a document stored less than max_age seconds ago, None on a miss
+    def get(self, key, max_age):
+        offset, key_digest = self.locate(key)
+        for _ in range(3):
+            sequence, stored_at, length, stored_key, payload_digest, _ = self.HEADER.unpack_from(self.map, offset)
+            if sequence % 2:
+                continue
+            if stored_key != key_digest or length <= 0 or time.time() - stored_at > max_age:
+                return None
+            cached = self.decoded.get(offset)
+            if cached is not None and cached[0] == sequence:
+                return cached[1]
+            start = offset + self.HEADER.size
+            payload = self.map[start:start + length]
+            if self.HEADER.unpack_from(self.map, offset)[0] != sequence \
+                    or hashlib.blake2b(payload, digest_size=16).digest() != payload_digest:
+                continue
+            resume_data = json.loads(payload)
+            self.decoded[offset] = (sequence, resume_data)
+            return resume_data
+        return None
+
+    # Function to store a document for every worker. An unchanged (key, _etag) only has its time renewed
+    def put(self, key, resume_data):
+        offset, key_digest = self.locate(key)
+        etag = str(resume_data.get('_etag') or '').encode()[:64]
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            sequence, _, length, stored_key, payload_digest, stored_etag = self.HEADER.unpack_from(self.map, offset)
+            if not (etag and stored_key == key_digest and stored_etag.rstrip(b'\0') == etag and length > 0):
+                payload = json.dumps(resume_data, separators=(',', ':')).encode()
+                if self.HEADER.size + len(payload) > self.slot_bytes:
+                    return False
+                length = len(payload)
+                payload_digest = hashlib.blake2b(payload, digest_size=16).digest()
+            else:
+                payload = None
+            sequence = sequence | 1
+            struct.pack_into('<Q', self.map, offset, sequence)
+            if payload is not None:
+                start = offset + self.HEADER.size
+                self.map[start:start + length] = payload
+            self.HEADER.pack_into(self.map, offset, sequence + 1, time.time(), length, key_digest, payload_digest, etag)
+            return True
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+if DATA_SOURCE == 'snapshot':
+    # Emergency read-only mode, no Cosmos client is created at all
+    snapshot_store = SnapshotStore(SNAPSHOT_PATH)
+    client = database = container = None
+else:
+    snapshot_store = None
+    # Initialize Cosmos DB client
+    client = CosmosClient(COSMOS_DB_ENDPOINT, credential=COSMOS_DB_KEY, **cosmos_settings.client_kwargs())
+    database = client.get_database_client(COSMOS_DB_DATABASE)
+    container = database.get_container_client(COSMOS_DB_CONTAINER)
+
+# One cache file per account, database and container, so function apps sharing a host never mix data
+if container is not None and SHARED_CACHE_SECONDS > 0 and fcntl is not None:
+    cache_name = hashlib.blake2b(f'{COSMOS_DB_ENDPOINT}|{COSMOS_DB_DATABASE}|{COSMOS_DB_CONTAINER}'.encode(), digest_size=8).hexdigest()
+    shared_cache = SharedResumeCache(os.path.join(tempfile.gettempdir(), f'resume-api-cache-{cache_name}.bin'),
+                                     SHARED_CACHE_SLOTS, SHARED_CACHE_SLOT_BYTES)
+else:
+    shared_cache = None
+
+# Function to build the per-operation options, read_path relaxes consistency for resume reads
+# The timeout spans the SDK's own retries, so it is capped by whatever is left of the request deadline
+def cosmos_options(read_path=False):
+    timeout = cosmos_settings.operation_timeout
+    remaining = remaining_budget()
+    if remaining is not None:
+        if remaining <= 0:
+            raise DeadlineExceededError('Request deadline passed before the Cosmos call')
+        timeout = min(timeout, remaining)
+    options = {'timeout': timeout}
+    if tracer is not None:
+        options['response_hook'] = record_request_charge
+    if read_path and cosmos_settings.read_consistency_level:
+        options['initial_headers'] = {'x-ms-consistency-level': cosmos_settings.read_consistency_level}
+    return options
+
+class CircuitOpenError(Exception):
+    pass
+
+# Circuit breaker around Cosmos calls. Errors and calls slower than slow_call_seconds count as
+# failures; once the failure rate over the last `window` calls reaches failure_rate the breaker
+# opens and calls fail fast for open_seconds, then a single half-open probe decides whether to close
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, window, min_calls, failure_rate, slow_call_seconds, open_seconds):
+        self.results = deque(maxlen=window)
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+
+    # Returns True when a call may go through, and claims the probe slot when half-open
+    def allow(self):
+        with self.lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.open_seconds:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self.probe_in_flight:
+                    return False
+                self.probe_in_flight = True
+                return True
+            return self.state == self.CLOSED
+
+    def record(self, failed):
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.probe_in_flight = False
+                if failed:
+                    self._open()
+                else:
+                    self.state = self.CLOSED
+                    self.results.clear()
+                return
+            self.results.append(failed)
+            if len(self.results) >= self.min_calls and sum(self.results) / len(self.results) >= self.failure_rate:
+                self._open()
+
+    # Gives back the half-open probe slot of a call that told nothing about Cosmos, without changing state
+    def abandon(self):
+        with self.lock:
+            if self.state == self.HALF_OPEN:
+                self.probe_in_flight = False
+
+    def _open(self):
+        if self.state != self.OPEN:
+            log_event(logging.WARNING, 'circuit_opened')
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self.results.clear()
+
+    # Seconds until the next half-open probe, used for Retry-After
+    def retry_after(self):
+        return max(0.0, self.open_seconds - (time.monotonic() - self.opened_at))
+
+    def call(self, fn, *args, **kwargs):
+        remaining = remaining_budget()
+        if remaining is not None and remaining <= 0:
+            # Nothing would reach Cosmos, so neither the outcome nor the probe slot is touched
+            raise DeadlineExceededError('Request deadline passed before the Cosmos call')
+        if not self.allow():
+            raise CircuitOpenError('Cosmos circuit breaker is open')
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except exceptions.CosmosResourceNotFoundError:
+            # A missing document is an answer, not an outage
+            self.record(False)
+            raise
+        except (DeadlineExceededError, exceptions.CosmosClientTimeoutError):
+            # The budget may have been cut short by the request: a slow call counts against Cosmos,
+            # a quick timeout says nothing either way and is not recorded at all
+            if time.monotonic() - started > self.slow_call_seconds:
+                self.record(True)
+            else:
+                self.abandon()
+            raise
+        except Exception:
+            self.record(True)
+            raise
+        self.record(time.monotonic() - started > self.slow_call_seconds)
+        return result
+
+cosmos_breaker = CircuitBreaker(BREAKER_WINDOW, BREAKER_MIN_CALLS, BREAKER_FAILURE_RATE, BREAKER_SLOW_CALL_SECONDS, BREAKER_OPEN_SECONDS)
+
+# Last known good values, served marked stale while Cosmos is failing or the breaker is open
+LAST_GOOD_MAX_RESUMES = 256
+last_good_resumes = OrderedDict()
+# Recent versions of each last good copy, oldest first, so delta responses can diff against them
+resume_history = {}
+# When each last good copy was last asked for, so the background refresh skips the ones nobody reads
+resume_requested_at = {}
+last_good_count = None
+last_good_lock = threading.Lock()
+
+# The displayed visitor count is served from last_good_count while it is younger than
+# VISITOR_COUNT_MAX_STALENESS_SECONDS; this worker's own increments and a background ticker keep it fresh
+last_good_count_at = float('-inf')
+last_count_request_at = float('-inf')
+count_refresh_thread = None
+
+# Function to record a count just read from or written to Cosmos
+def remember_count(count):
+    global last_good_count, last_good_count_at
+    with last_good_lock:
+        last_good_count = count
+        last_good_count_at = time.monotonic()
+
+# Function to query the visitor count from Cosmos
+def query_visitor_count():
+    if snapshot_store is not None:
+        visitor_doc = snapshot_store.get('visitor_count')
+        return visitor_doc.get('visitorCount', 0) if visitor_doc else 0
+    query = "SELECT c.visitorCount FROM c WHERE c.id = 'visitor_count'"
+    items = list(container.query_items(query=query, enable_cross_partition_query=True, **cosmos_options()))
+    if items:
+        return items[0].get('visitorCount', 0)
+    return 0
+
+# Function to tell whether the count in memory is within the staleness bound
+def count_is_fresh():
+    return time.monotonic() - last_good_count_at <= VISITOR_COUNT_MAX_STALENESS_SECONDS
+
+# Function to get visitor count, returns (count, stale)
+def get_visitor_count():
+    global last_count_request_at
+    last_count_request_at = time.monotonic()
+    if count_is_fresh():
+        return last_good_count, False
+    # With the deadline close, an older count beats a late response
+    if last_good_count is not None and not budget_allows_optional_work():
+        return last_good_count, True
+    try:
+        with span('get_visitor_count', **{'db.system': 'cosmosdb', 'db.operation': 'query'}):
+            count = cosmos_breaker.call(query_visitor_count)
+        remember_count(count)
+        ensure_background_refresh()
+        ensure_count_refresh()
+        return count, False
+    except Exception as e:
+        log_event(logging.ERROR, 'visitor_count_read_failed', error=e)
+        if last_good_count is not None:
+            return last_good_count, True
+        return -1, False  # Return a specific value to indicate error
+
+# Background ticker that re-reads the count at most every half staleness interval, and only once a
+# request has been served the value in memory. A visit that read Cosmos itself triggers no re-read,
+# so the ticker never queries more often than requests would have without the cache
+def ensure_count_refresh():
+    global count_refresh_thread
+    if VISITOR_COUNT_MAX_STALENESS_SECONDS <= 0 or count_refresh_thread is not None:
+        return
+    with last_good_lock:
+        if count_refresh_thread is None:
+            count_refresh_thread = threading.Thread(target=refresh_count_forever, name='visitor-count-refresh', daemon=True)
+            count_refresh_thread.start()
+
+def refresh_count_forever():
+    while True:
+        time.sleep(VISITOR_COUNT_MAX_STALENESS_SECONDS / 2)
+        demanded = last_count_request_at > last_good_count_at
+        fresh = time.monotonic() - last_good_count_at < VISITOR_COUNT_MAX_STALENESS_SECONDS / 2
+        if not demanded or fresh or cosmos_breaker.state != CircuitBreaker.CLOSED:
+            continue
+        try:
+            remember_count(cosmos_breaker.call(query_visitor_count))
+        except Exception as e:
+            log_event(logging.WARNING, 'visitor_count_refresh_failed', error=e)
+
+# Function to tell whether a visitor was already counted, so its visit needs no write
+def visitor_counted(fingerprint):
+    return visitor_filter is not None and fingerprint in visitor_filter
+
+# Function to add one visit to the counter document in Cosmos, returns the new count
+def write_visitor_increment():
+    if snapshot_store is not None:
+        # Snapshots are read-only, the count shown is the one captured at export time
+        return None
+    query = "SELECT * FROM c WHERE c.id = 'visitor_count'"
+    items = list(container.query_items(query=query, enable_cross_partition_query=True, **cosmos_options()))
+    if items:
+        visitor_doc = items[0]
+        visitor_doc['visitorCount'] += 1
+        container.upsert_item(visitor_doc, **cosmos_options())
+        return visitor_doc['visitorCount']
+    container.upsert_item({"id": "visitor_count", "visitorCount": 1}, **cosmos_options())
+    return 1
+
+# Set of recently counted visitors with a fixed memory budget: two Bloom filters, each covering half the
+# window. New fingerprints go into the current filter, and every half window the older filter is dropped,
+# so a fingerprint is remembered for between half and all of the window. A false positive skips one
+# genuine visit, with a probability of at most error_rate while each half window sees at most capacity visitors
+class RotatingBloomFilter:
+    def __init__(self, capacity, error_rate, window_seconds, clock=time.monotonic):
+        self.bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.half_window = window_seconds / 2
+        self.current = bytearray((self.bits + 7) // 8)
+        self.previous = bytearray(len(self.current))
+        self.clock = clock
+        self.rotated_at = clock()
+        self.lock = threading.Lock()
+
+    # Memory held by both filters, in bytes
+    @property
+    def size(self):
+        return len(self.current) + len(self.previous)
+
+    def positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    @staticmethod
+    def contains(bits, positions):
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in positions)
+
+    # Called with the lock held
+    def rotate(self):
+        now = self.clock()
+        if now - self.rotated_at >= self.half_window:
+            # After a full window of silence both filters are out of date
+            self.previous = self.current if now - self.rotated_at < 2 * self.half_window else bytearray(len(self.current))
+            self.current = bytearray(len(self.previous))
+            self.rotated_at = now
+
+    # Function to tell whether an item was added within the window (or is a false positive)
+    def __contains__(self, item):
+        positions = self.positions(item)
+        with self.lock:
+            self.rotate()
+            return self.contains(self.current, positions) or self.contains(self.previous, positions)
+
+    def add(self, item):
+        positions = self.positions(item)
+        with self.lock:
+            self.rotate()
+            for position in positions:
+                self.current[position >> 3] |= 1 << (position & 7)
+
+visitor_filter = RotatingBloomFilter(VISITOR_DEDUP_CAPACITY, VISITOR_DEDUP_ERROR_RATE, VISITOR_DEDUP_WINDOW_SECONDS) \
+    if VISITOR_DEDUP_WINDOW_SECONDS > 0 else None
+
+# Function to name a client for visitor deduplication; the address and user agent are only ever hashed.
+# None when the address is unknown, since those clients cannot be told apart
+def visitor_fingerprint(headers):
+    address = client_key(headers)
+    return None if address == 'anonymous' else f"{address}|{headers.get('user-agent', '')}"
+
+# Function to increment visitor count. Clients counted within the dedup window are not written again
+def increment_visitor_count(fingerprint=None):
+    record_hit()
+    # A visitor is only remembered once its visit was actually written, so a skipped or failed
+    # write leaves the next request free to count it
+    if fingerprint is not None and visitor_counted(fingerprint):
+        log_event(logging.DEBUG, 'visitor_count_increment_skipped', reason='repeat_visitor')
+        return
+    if not budget_allows_optional_work():
+        log_event(logging.WARNING, 'visitor_count_increment_skipped', reason='deadline')
+        return
+    try:
+        with span('increment_visitor_count', **{'db.system': 'cosmosdb', 'db.operation': 'upsert'}):
+            count = cosmos_breaker.call(write_visitor_increment)
+        if fingerprint is not None and visitor_filter is not None:
+            visitor_filter.add(fingerprint)
+        # The write just read the counter, so the displayed count needs no extra round trip
+        if count is not None:
+            remember_count(count)
+    except CircuitOpenError:
+        # Writes are not worth queueing behind an outage
+        log_event(logging.WARNING, 'visitor_count_increment_skipped', reason='circuit_open')
+    except Exception as e:
+        log_event(logging.ERROR, 'visitor_count_increment_failed', error=e)
+
+# Visitor analytics. Hits are counted in memory per UTC minute and flushed in batches into one
+# hourly document (per-minute counts) and one daily document (per-hour counts), so each flush writes
+# O(1) documents per interval however busy it was. Stats documents live in their own 'stats' partition
+STATS_PARTITION = 'stats'
+# Cosmos accepts at most 10 operations per patch; one is always the /total increment
+PATCH_MAX_OPERATIONS = 10
+hit_buckets = {}
+hit_buckets_lock = threading.Lock()
+analytics_thread = None
+
+# Function to count one hit in the current minute bucket
+def record_hit():
+    if container is None or ANALYTICS_FLUSH_SECONDS <= 0:
+        return
+    minute = int(time.time() // 60)
+    with hit_buckets_lock:
+        hit_buckets[minute] = hit_buckets.get(minute, 0) + 1
+    ensure_analytics_flush()
+
+def ensure_analytics_flush():
+    global analytics_thread
+    if analytics_thread is not None:
+        return
+    with hit_buckets_lock:
+        if analytics_thread is None:
+            analytics_thread = threading.Thread(target=flush_hits_forever, name='analytics-flush', daemon=True)
+            analytics_thread.start()
+
+def flush_hits_forever():
+    while True:
+        time.sleep(ANALYTICS_FLUSH_SECONDS)
+        flush_hits()
+
+# Function to write every completed minute bucket to the rollup documents. Buckets are turned into
+# pending increments per hourly and daily document, split so each fits in one patch. Increments that fail
+# on a transient error stay queued for the next run; ones Cosmos rejects outright are logged and dropped
+pending_rollups = []
+
+# Analytics writes have their own breaker, so a failing rollup can never open the one resume reads use
+analytics_breaker = CircuitBreaker(BREAKER_WINDOW, BREAKER_MIN_CALLS, BREAKER_FAILURE_RATE, BREAKER_SLOW_CALL_SECONDS, BREAKER_OPEN_SECONDS)
+
+# Function to split the counts of one rollup document into pieces that each fit in one patch
+def rollup_chunks(granularity, bucket, field, counts, extra):
+    keys = sorted(counts)
+    size = PATCH_MAX_OPERATIONS - 1
+    return [(granularity, bucket, field, {key: counts[key] for key in keys[start:start + size]}, extra)
+            for start in range(0, len(keys), size)]
+
+def flush_hits(include_current=False):
+    current_minute = int(time.time() // 60)
+    with hit_buckets_lock:
+        ready = {minute: hits for minute, hits in hit_buckets.items() if include_current or minute < current_minute}
+        for minute in ready:
+            del hit_buckets[minute]
+
+        hours = {}
+        days = {}
+        for minute, hits in ready.items():
+            moment = datetime.fromtimestamp(minute * 60, timezone.utc)
+            minutes = hours.setdefault(moment.strftime('%Y-%m-%dT%H'), {})
+            minutes[moment.strftime('%M')] = minutes.get(moment.strftime('%M'), 0) + hits
+            day_hours = days.setdefault(moment.strftime('%Y-%m-%d'), {})
+            day_hours[moment.strftime('%H')] = day_hours.get(moment.strftime('%H'), 0) + hits
+        for bucket, counts in hours.items():
+            pending_rollups.extend(rollup_chunks('hour', bucket, 'minutes', counts, {'day': bucket[:10]}))
+        for bucket, counts in days.items():
+            pending_rollups.extend(rollup_chunks('day', bucket, 'hours', counts, {}))
+        batch = list(pending_rollups)
+        pending_rollups.clear()
+
+    written = 0
+    for index, (granularity, bucket, field, counts, extra) in enumerate(batch):
+        try:
+            analytics_breaker.call(add_to_rollup, granularity, bucket, field, counts, **extra)
+            written += 1
+        except exceptions.CosmosHttpResponseError as e:
+            if e.status_code is not None and 400 <= e.status_code < 500 and e.status_code not in (408, 429):
+                # Retrying a rejected request can only fail again and would block every later flush
+                log_event(logging.ERROR, 'analytics_rollup_dropped', bucket=bucket, status=e.status_code,
+                          hits=sum(counts.values()), error=e)
+                continue
+            requeue_rollups(batch[index:], e)
+            return
+        except Exception as e:
+            requeue_rollups(batch[index:], e)
+            return
+    if batch:
+        log_event(logging.INFO, 'analytics_flushed', documents=written, hits=sum(ready.values()))
+
+# Function to put unwritten increments back at the head of the queue for the next flush
+def requeue_rollups(remaining, error):
+    log_event(logging.WARNING, 'analytics_flush_failed', error=error, pending=len(remaining))
+    with hit_buckets_lock:
+        pending_rollups[:0] = remaining
+
+# Function to add counts to one rollup document with an atomic Cosmos patch, creating it on first use
+def add_to_rollup(granularity, bucket, field, counts, **extra):
+    document_id = f'visitorstats-{granularity}-{bucket}'
+    operations = [{'op': 'incr', 'path': f'/{field}/{key}', 'value': value} for key, value in counts.items()]
+    operations.append({'op': 'incr', 'path': '/total', 'value': sum(counts.values())})
+    try:
+        container.patch_item(document_id, partition_key=STATS_PARTITION, patch_operations=operations, **cosmos_options())
+    except exceptions.CosmosResourceNotFoundError:
+        document = {'id': document_id, 'lang': STATS_PARTITION, 'type': f'visitorstats-{granularity}',
+                    'bucket': bucket, field: dict(counts), 'total': sum(counts.values()), **extra}
+        try:
+            container.create_item(document, **cosmos_options())
+        except exceptions.CosmosResourceExistsError:
+            # Another worker created it first
+            container.patch_item(document_id, partition_key=STATS_PARTITION, patch_operations=operations, **cosmos_options())
+
+# Function to read a visitor time series straight from the rollup documents
+def query_visitor_stats(granularity, start, end):
+    document_type = 'visitorstats-day' if granularity == 'day' else 'visitorstats-hour'
+    bucket_format = '%Y-%m-%d' if granularity == 'day' else '%Y-%m-%dT%H'
+    query = ("SELECT c.bucket, c.total, c.minutes FROM c WHERE c.type = @type "
+             "AND c.bucket >= @start AND c.bucket <= @end ORDER BY c.bucket")
+    parameters = [
+        {'name': '@type', 'value': document_type},
+        {'name': '@start', 'value': start.strftime(bucket_format)},
+        {'name': '@end', 'value': end.strftime(bucket_format)},
+    ]
+    items = container.query_items(query=query, parameters=parameters, partition_key=STATS_PARTITION, **cosmos_options())
+
+    series = []
+    for item in items:
+        if granularity == 'minute':
+            for minute, hits in sorted((item.get('minutes') or {}).items()):
+                moment = datetime.strptime(f"{item['bucket']}:{minute}", '%Y-%m-%dT%H:%M').replace(tzinfo=timezone.utc)
+                if start <= moment <= end:
+                    series.append({'time': moment.isoformat().replace('+00:00', 'Z'), 'count': hits})
+        else:
+            moment = datetime.strptime(item['bucket'], bucket_format).replace(tzinfo=timezone.utc)
+            series.append({'time': moment.isoformat().replace('+00:00', 'Z'), 'count': item.get('total', 0)})
+    return series
+
+# Cosmos metadata and routing fields that are never returned to callers
+keys_to_remove = ['_rid', '_self', '_etag', '_attachments', '_ts', 'id', 'lang', 'sections', 'count']
+
+# Hedged reads for the resume query. When a read is slower than the recent HEDGE_PERCENTILE latency, a
+# second identical read is sent, to the next preferred region when there is one, and whichever answers
+# first wins. Every read earns HEDGE_BUDGET_RATIO of a token and each hedge spends a whole one, so hedges
+# stay a small share of traffic even when Cosmos is slow across the board
+class HedgedReader:
+    MIN_SAMPLES = 20
+    MAX_TOKENS = 10
+
+    def __init__(self, percentile, min_delay, budget_ratio, max_workers):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.budget_ratio = budget_ratio
+        self.latencies = deque(maxlen=256)
+        self.tokens = 0.0
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedged-read')
+
+    # Seconds to wait before hedging, None until enough reads were seen to know what slow means
+    def delay(self):
+        with self.lock:
+            if len(self.latencies) < self.MIN_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+        return max(self.min_delay, ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))])
+
+    def observe(self, seconds):
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def spend(self):
+        with self.lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def submit(self, read, hedge):
+        # Each read runs in a copy of the caller's context so it keeps the request deadline
+        return self.pool.submit(contextvars.copy_context().run, read, hedge)
+
+    # Function to run read(hedge=False), and read(hedge=True) alongside it once the first is slow
+    def read(self, read):
+        with self.lock:
+            self.tokens = min(self.MAX_TOKENS, self.tokens + self.budget_ratio)
+        started = time.monotonic()
+        primary = self.submit(read, False)
+        primary.add_done_callback(lambda future: future.exception() is None and self.observe(time.monotonic() - started))
+        delay = self.delay()
+        if delay is None or wait([primary], timeout=delay).done or not self.spend():
+            return primary.result()
+        log_event(logging.INFO, 'resume_read_hedged', delay_ms=round(delay * 1000, 1))
+        pending = {primary, self.submit(read, True)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+        # Both failed, report the primary's error
+        return primary.result()
+
+hedged_reader = HedgedReader(HEDGE_PERCENTILE, HEDGE_MIN_DELAY_MS / 1000, HEDGE_BUDGET_RATIO, max(4, 2 * ADMISSION_MAX_IN_FLIGHT)) \
+    if HEDGE_READS_ENABLED and container is not None else None
+
+# Function to build the extra options of a hedge: skip the first preferred region so the second read
+# goes to the next one. With a single region the hedge is a plain retry that may reach another replica
+def hedge_options(hedge):
+    if hedge and len(cosmos_settings.preferred_regions) > 1:
+        return {'excluded_locations': [cosmos_settings.preferred_regions[0]]}
+    return {}
+
+# Function to fetch a single resume document, returns None when it does not exist
+def fetch_resume(resume_id, lang, filter_by=None):
+    if snapshot_store is not None:
+        resume_data = snapshot_store.get(resume_id, lang)
+        # Same test as the ARRAY_CONTAINS clause below
+        if resume_data is not None and filter_by and f'{{"type": "{filter_by}"}}' not in resume_data.get('sections', []):
+            return None
+        return resume_data
+    query = f"SELECT c FROM c WHERE c.id = '{resume_id}' AND c.lang = '{lang}'"
+    if filter_by:
+        query += f" AND ARRAY_CONTAINS(c.sections, '{{\"type\": \"{filter_by}\"}}')"
+    def read(hedge):
+        return list(container.query_items(query=query, enable_cross_partition_query=True,
+                                          **cosmos_options(read_path=True), **hedge_options(hedge)))
+    items = hedged_reader.read(read) if hedged_reader is not None else read(False)
+    if items:
+        return items[0]['c']
+    return None
+
+# Function to get a resume through the circuit breaker, returns (resume, stale).
+# When Cosmos fails or the breaker is open the last good copy is served instead
+def get_resume(resume_id, lang, filter_by=None):
+    key = (resume_id, lang, filter_by)
+    resume_data = shared_resume(key)
+    if resume_data is not None:
+        return resume_data, False
+    try:
+        with span('fetch_resume', **{'db.system': 'cosmosdb', 'db.operation': 'query', 'resume.lang': lang}):
+            resume_data = cosmos_breaker.call(fetch_resume, resume_id, lang, filter_by)
+    except Exception as e:
+        with last_good_lock:
+            cached = last_good_resumes.get(key)
+        if cached is None:
+            raise
+        log_event(logging.WARNING, 'stale_resume_served', id=resume_id, lang=lang, error=e)
+        mark_requested(key)
+        return cached, True
+    if resume_data is not None:
+        remember_resume(key, resume_data)
+        mark_requested(key)
+        ensure_background_refresh()
+    return resume_data, False
+
+# Function to take a copy another worker fetched moments ago, which is as good as a fresh read.
+# Returns None when there is none, the caller then has to go to Cosmos
+def shared_resume(key):
+    if shared_cache is None:
+        return None
+    resume_data = shared_cache.get(key, SHARED_CACHE_SECONDS)
+    if resume_data is not None:
+        remember_resume(key, resume_data, share=False)
+        mark_requested(key)
+    return resume_data
+
+# Function to note that a last good copy was asked for. Keys without a copy are not tracked, so
+# requests for ids that do not exist cannot grow the map past LAST_GOOD_MAX_RESUMES
+def mark_requested(key):
+    with last_good_lock:
+        if key in last_good_resumes:
+            resume_requested_at[key] = time.monotonic()
+
+# Function to store a resume as the last good copy for its key, as a new version in its history
+# and, unless it came from there, in the shared cache
+def remember_resume(key, resume_data, share=True, purge=False):
+    if share and shared_cache is not None:
+        shared_cache.put(key, resume_data)
+    with last_good_lock:
+        previous = last_good_resumes.get(key)
+        last_good_resumes[key] = resume_data
+        last_good_resumes.move_to_end(key)
+        if DELTA_HISTORY_VERSIONS > 0:
+            history = resume_history.setdefault(key, deque(maxlen=DELTA_HISTORY_VERSIONS))
+            if not history or resume_version(history[-1]) != resume_version(resume_data):
+                history.append(resume_data)
+        if len(last_good_resumes) > LAST_GOOD_MAX_RESUMES:
+            evicted, _ = last_good_resumes.popitem(last=False)
+            resume_history.pop(evicted, None)
+            resume_requested_at.pop(evicted, None)
+    # Copies taken from the shared cache were already seen by the worker that fetched them.
+    # A write (purge=True) always purges, since this worker may never have held the old copy
+    if share and (purge or previous is not None and resume_version(previous) != resume_version(resume_data)):
+        purge_edge(key[0], key[1], resume_version(resume_data))
+
+# Function to name the version of a stored document, as sent back by clients asking for a delta
+def resume_version(resume_data):
+    version = resume_data.get('_etag') or resume_data.get('_ts')
+    return str(version) if version is not None else None
+
+# Function to find the version a client holds in the history of a key, matched on _etag or _ts
+def find_version(key, since):
+    with last_good_lock:
+        history = list(resume_history.get(key, ()))
+    for resume_data in reversed(history):
+        if since in (resume_data.get('_etag'), str(resume_data.get('_ts'))):
+            return resume_data
+    return None
+
+# Background refresh keeps the last good copies current while the breaker is closed,
+# so a later outage serves recent data rather than whatever the last request happened to see
+refresh_thread = None
+
+def ensure_background_refresh():
+    global refresh_thread
+    if BACKGROUND_REFRESH_SECONDS <= 0 or refresh_thread is not None:
+        return
+    with last_good_lock:
+        if refresh_thread is None:
+            refresh_thread = threading.Thread(target=refresh_last_good, name='cosmos-refresh', daemon=True)
+            refresh_thread.start()
+
+# Only copies and the count asked for within the last ten intervals are refreshed, so a worker
+# without traffic spends no RUs
+def refresh_last_good():
+    while True:
+        time.sleep(BACKGROUND_REFRESH_SECONDS)
+        if cosmos_breaker.state != CircuitBreaker.CLOSED:
+            continue
+        recent = time.monotonic() - 10 * BACKGROUND_REFRESH_SECONDS
+        with last_good_lock:
+            keys = [key for key in last_good_resumes if resume_requested_at.get(key, float('-inf')) >= recent]
+        try:
+            for key in keys:
+                resume_data = cosmos_breaker.call(fetch_resume, *key)
+                if resume_data is not None:
+                    remember_resume(key, resume_data)
+            if last_count_request_at >= recent:
+                remember_count(cosmos_breaker.call(query_visitor_count))
+        except Exception as e:
+            log_event(logging.WARNING, 'background_refresh_failed', error=e)
+
+# Function to strip metadata and apply theme and pagination, raises ValueError on a bad page
+def shape_resume(resume_data, theme=None, page=None, page_size=None):
+    with span('project_resume', theme=theme or ''):
+        resume_data = project_resume(resume_data, theme)
+    # Add pagination if requested
+    if page and page_size:
+        with span('paginate', page=str(page), page_size=str(page_size)):
+            resume_data = paginate_resume(resume_data, page, page_size)
+    return resume_data
+
+# Function to strip metadata and apply the theme projection
+def project_resume(resume_data, theme=None):
+    # Documents written by the ingestion API already carry their cleaned projections
+    projections = resume_data.get('projections')
+    if projections is not None:
+        return projections.get(theme) or projections['full']
+
+    # Remove the specified sections, copying so the cached document is left intact
+    resume_data = {key: value for key, value in resume_data.items() if key not in keys_to_remove}
+
+    # Apply theme filtering
+    if theme == 'minimal':
+        resume_data = {
+            'basics': resume_data.get('basics', {}),
+            'work': resume_data.get('work', [])
+        }
+    return resume_data
+
+# Resumes sent to the ingestion API are validated against the JSON Resume schema
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schemas', 'resume.schema.json'), encoding='utf-8') as schema_file:
+    resume_validator = jsonschema.Draft7Validator(json.load(schema_file))
+
+# Function to list the schema violations of one resume, empty when it is valid
+def validate_resume(resume):
+    return [f"{'/'.join(str(part) for part in error.absolute_path) or '(root)'}: {error.message}"
+            for error in resume_validator.iter_errors(resume)]
+
+# Function to turn a JSON Resume into the stored document: metadata stripped and every theme
+# projection computed once, so reads serve them as-is
+def normalize_resume(resume_id, lang, resume):
+    full = {key: value for key, value in resume.items() if key not in keys_to_remove and key != '$schema'}
+    return {
+        'id': resume_id,
+        'lang': lang,
+        # Matches the ARRAY_CONTAINS test used by the filter parameter
+        'sections': [f'{{"type": "{section}"}}' for section in full],
+        'projections': {
+            'full': full,
+            'minimal': {'basics': full.get('basics', {}), 'work': full.get('work', [])}
+        }
+    }
 
-# Initialize Cosmos DB client
-client = CosmosClient(COSMOS_DB_ENDPOINT, credential=COSMOS_DB_KEY)
-database = client.get_database_client(COSMOS_DB_DATABASE)
-container = database.get_container_client(COSMOS_DB_CONTAINER)
+# Function to store one normalized resume and make it this worker's last good copy
+def store_resume(document):
+    stored = cosmos_breaker.call(container.upsert_item, document, **cosmos_options())
+    remember_resume((document['id'], document['lang'], None), stored, purge=True)
+    return stored
+
+# Function to return one page of the work section
+def paginate_resume(resume_data, page, page_size):
+    page = int(page)
+    page_size = int(page_size)
+    start_index = (page - 1) * page_size
+    end_index = start_index + page_size
+    return resume_data['work'][start_index:end_index]  # Adjusted for 'work' section
+
+# Function to escape one key for a JSON Pointer (RFC 6901)
+def pointer_token(key):
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+# Function to build the JSON Patch (RFC 6902) that turns old into new. Objects are diffed key by key
+# and arrays element by element, with elements added or removed at the end
+def json_patch(old, new, path=''):
+    if type(old) is not type(new):
+        return [{'op': 'replace', 'path': path, 'value': new}]
+    if isinstance(old, dict):
+        operations = [{'op': 'remove', 'path': f'{path}/{pointer_token(key)}'} for key in old if key not in new]
+        for key, value in new.items():
+            if key in old:
+                operations += json_patch(old[key], value, f'{path}/{pointer_token(key)}')
+            else:
+                operations.append({'op': 'add', 'path': f'{path}/{pointer_token(key)}', 'value': value})
+        return operations
+    if isinstance(old, list):
+        operations = []
+        for index in range(min(len(old), len(new))):
+            operations += json_patch(old[index], new[index], f'{path}/{index}')
+        # Removed from the end backwards so every index is still valid when its operation applies
+        for index in range(len(old) - 1, len(new) - 1, -1):
+            operations.append({'op': 'remove', 'path': f'{path}/{index}'})
+        for value in new[len(old):]:
+            operations.append({'op': 'add', 'path': f'{path}/-', 'value': value})
+        return operations
+    return [] if old == new else [{'op': 'replace', 'path': path, 'value': new}]
+
+# Full-text search: each work highlight and each work, skills, projects and education entry is
+# one searchable entry, ranked with BM25 over an inverted index kept per (id, lang)
+SEARCH_SECTIONS = ('work', 'skills', 'projects', 'education')
+SEARCH_SKIPPED_KEYS = {'url', 'startDate', 'endDate'}
+SEARCH_TOKEN = re.compile(r'[a-z0-9][a-z0-9+#]*', re.IGNORECASE)
+SEARCH_SNIPPET_CHARS = 120
+SEARCH_MAX_RESULTS = 50
+
+# Function to join every string inside an entry into one searchable text
+def search_text(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        value = [item for key, item in value.items() if key not in SEARCH_SKIPPED_KEYS]
+    if isinstance(value, list):
+        return ' '.join(text for text in map(search_text, value) if text)
+    return ''
+
+# Function to list the searchable entries of a resume as (section, path, title, text)
+def search_entries(resume_data):
+    for section in SEARCH_SECTIONS:
+        items = resume_data.get(section)
+        if not isinstance(items, list):
+            continue
+        for i, item in enumerate(items):
+            path = f'{section}/{i}'
+            title = None
+            if isinstance(item, dict):
+                title = item.get('name') or item.get('institution') or item.get('position')
+                if isinstance(item.get('highlights'), list):
+                    for j, highlight in enumerate(item['highlights']):
+                        yield section, f'{path}/highlights/{j}', title, search_text(highlight)
+                    item = {key: value for key, value in item.items() if key != 'highlights'}
+            yield section, path, title, search_text(item)
+
+class SearchIndex:
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, resume_data):
+        self.entries = [entry for entry in search_entries(resume_data) if entry[3]]
+        self.postings = {}
+        self.lengths = []
+        for number, (_, _, _, text) in enumerate(self.entries):
+            terms = [token.lower() for token in SEARCH_TOKEN.findall(text)]
+            self.lengths.append(len(terms))
+            for term in terms:
+                counts = self.postings.setdefault(term, {})
+                counts[number] = counts.get(number, 0) + 1
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0
+
+    def search(self, query, limit):
+        terms = {token.lower() for token in SEARCH_TOKEN.findall(query)}
+        scores = {}
+        for term in terms:
+            counts = self.postings.get(term)
+            if not counts:
+                continue
+            idf = math.log(1 + (len(self.entries) - len(counts) + 0.5) / (len(counts) + 0.5))
+            for number, count in counts.items():
+                norm = self.K1 * (1 - self.B + self.B * self.lengths[number] / self.average_length)
+                scores[number] = scores.get(number, 0) + idf * count * (self.K1 + 1) / (count + norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        results = []
+        for number, score in ranked[:limit]:
+            section, path, title, text = self.entries[number]
+            results.append({
+                'section': section,
+                'path': path,
+                'title': title,
+                'score': round(score, 4),
+                'snippet': self.snippet(text, terms)
+            })
+        return len(ranked), results
+
+    # Function to cut the text around its first matching term
+    @staticmethod
+    def snippet(text, terms):
+        if len(text) <= SEARCH_SNIPPET_CHARS:
+            return text
+        first = next((match.start() for match in SEARCH_TOKEN.finditer(text) if match.group().lower() in terms), 0)
+        start = max(0, min(first - SEARCH_SNIPPET_CHARS // 4, len(text) - SEARCH_SNIPPET_CHARS))
+        end = start + SEARCH_SNIPPET_CHARS
+        return ('…' if start else '') + text[start:end].strip() + ('…' if end < len(text) else '')
+
+search_indexes = OrderedDict()
+search_indexes_lock = threading.Lock()
+
+# Function to return the index of a document, rebuilt only when its _etag (or _ts) changes
+def search_index(resume_id, lang, resume_data):
+    version = resume_data.get('_etag') or resume_data.get('_ts') or id(resume_data)
+    key = (resume_id, lang)
+    with search_indexes_lock:
+        cached = search_indexes.get(key)
+        if cached is not None and cached[0] == version:
+            search_indexes.move_to_end(key)
+            return cached[1]
+    index = SearchIndex(project_resume(resume_data))
+    with search_indexes_lock:
+        search_indexes[key] = (version, index)
+        search_indexes.move_to_end(key)
+        if len(search_indexes) > LAST_GOOD_MAX_RESUMES:
+            search_indexes.popitem(last=False)
+    return index
+
+# Function to wrap resume data in the response envelope
+def build_envelope(visitor_count, resume_data):
+    timestamp_now = datetime.utcnow().isoformat() + "Z"
+    response_message = f"Oyeniyi Emmanuel resume retrieved successfully. Kudos to the organizers (Rishab Kumar and Ifeanyi Otuonye)!"
+
+    return {
+        "message": response_message,
+        "timestamp": timestamp_now,
+        "visitorCount": visitor_count,
+        "data": resume_data
+    }
 
-# Function to get visitor count
-def get_visitor_count():
+# Function to build the body of a cacheable response: the envelope without its per-request fields,
+# so the same resume always encodes to the same bytes
+def build_cacheable_envelope(resume_data):
+    envelope = build_envelope(None, resume_data)
+    del envelope['timestamp'], envelope['visitorCount']
+    return envelope
+
+# Function to name the surrogate keys a CDN tags cacheable responses with, for purging by resume
+def surrogate_keys(resume_id, lang):
+    resume_id, lang = (re.sub(r'[^\w.-]', '_', value) for value in (resume_id, lang))
+    return [f'resume-{resume_id}', f'resume-{resume_id}-{lang}']
+
+# Function to ask the edge to drop its copies of a resume that changed. The POST goes to EDGE_PURGE_URL
+# (for example a Logic App calling the Front Door purge API) off the request path
+def purge_edge(resume_id, lang, version):
+    if not EDGE_PURGE_URL:
+        return
+    payload = {'id': resume_id, 'lang': lang, 'version': version, 'surrogateKeys': surrogate_keys(resume_id, lang)}
+    threading.Thread(target=send_purge, args=(payload,), name='edge-purge', daemon=True).start()
+
+def send_purge(payload):
     try:
-        query = "SELECT c.visitorCount FROM c WHERE c.id = 'visitor_count'"
-        items = list(container.query_items(query=query, enable_cross_partition_query=True))
-        if items:
-            return items[0].get('visitorCount', 0)
-        return 0
+        requests.post(EDGE_PURGE_URL, json=payload, timeout=10).raise_for_status()
+        log_event(logging.INFO, 'edge_purge_sent', id=payload['id'], lang=payload['lang'], version=payload['version'])
     except Exception as e:
-        logging.error(f'Error fetching visitor count: {str(e)}')
-        return -1  # Return a specific value to indicate error
+        log_event(logging.WARNING, 'edge_purge_failed', id=payload['id'], lang=payload['lang'], error=e)
 
-# Function to increment visitor count
-def increment_visitor_count():
+# Function to fetch and shape one language of an export, missing languages come back as null.
+# The response is already under way when a language is fetched, so a failure becomes an error object in
+# its place rather than an exception that would cut the body short. Stale languages are added to stale_langs
+def export_resume(resume_id, lang, filter_by=None, theme=None, stale_langs=None):
     try:
-        query = "SELECT * FROM c WHERE c.id = 'visitor_count'"
-        items = list(container.query_items(query=query, enable_cross_partition_query=True))
-        if items:
-            visitor_doc = items[0]
-            visitor_doc['visitorCount'] += 1
-            container.upsert_item(visitor_doc)
-        else:
-            container.upsert_item({"id": "visitor_count", "visitorCount": 1})
+        resume_data, stale = get_resume(resume_id, lang, filter_by)
+    except CircuitOpenError:
+        log_event(logging.ERROR, 'resume_unavailable', id=resume_id, lang=lang)
+        return {"error": "Service temporarily unavailable"}
+    except (DeadlineExceededError, exceptions.CosmosClientTimeoutError):
+        log_event(logging.ERROR, 'resume_deadline_exceeded', id=resume_id, lang=lang)
+        return {"error": "Request deadline exceeded"}
     except Exception as e:
-        logging.error(f'Error incrementing visitor count: {str(e)}')
+        log_event(logging.ERROR, 'resume_read_failed', id=resume_id, lang=lang, error=e)
+        return {"error": "Internal server error"}
+    if resume_data is None:
+        log_event(logging.ERROR, 'resume_not_found', id=resume_id, lang=lang)
+        return None
+    if stale and stale_langs is not None:
+        stale_langs.append(lang)
+    return shape_resume(resume_data, theme)
+
+# Mapping whose values are produced only when iter_json reaches them,
+# so each section of an export is fetched and encoded while the previous one is on the wire
+class LazySections:
+    def __init__(self, loaders):
+        self.loaders = list(loaders)
+
+    def items(self):
+        for key, load in self.loaders:
+            yield key, load()
+
+    def __len__(self):
+        return len(self.loaders)
+
+# Generator-based JSON encoder: yields the same text as json.dumps(value, indent=indent),
+# one object member or array element at a time for the outer stream_depth levels
+def iter_json(value, indent=4, depth=0, stream_depth=2):
+    if depth < stream_depth and isinstance(value, (dict, LazySections)) and len(value):
+        padding = ' ' * indent * (depth + 1)
+        separator = '{'
+        for key, item in value.items():
+            yield f'{separator}\n{padding}{json.dumps(key)}: '
+            yield from iter_json(item, indent, depth + 1, stream_depth)
+            separator = ','
+        yield '\n' + ' ' * indent * depth + '}'
+    elif depth < stream_depth and isinstance(value, list) and value:
+        padding = ' ' * indent * (depth + 1)
+        separator = '['
+        for item in value:
+            yield f'{separator}\n{padding}'
+            yield from iter_json(item, indent, depth + 1, stream_depth)
+            separator = ','
+        yield '\n' + ' ' * indent * depth + ']'
+    else:
+        yield json.dumps(value, indent=indent).replace('\n', '\n' + ' ' * indent * depth)
+
+# Per-client token buckets. The table is an LRU capped at max_clients, so a flood of
+# distinct addresses evicts the least recently seen clients instead of growing memory
+class RateLimiter:
+    def __init__(self, per_minute, burst, max_clients):
+        self.rate = per_minute / 60.0
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    # Takes one token for client_id, returns 0 when allowed or the seconds until a token is free
+    def acquire(self, client_id):
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(client_id)
+            if bucket is None:
+                tokens = self.burst
+            else:
+                tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                self.buckets.move_to_end(client_id)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0
+            else:
+                wait = (1 - tokens) / self.rate
+            self.buckets[client_id] = (tokens, now)
+            if len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+        return wait
+
+rate_limiter = RateLimiter(RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST, RATE_LIMIT_MAX_CLIENTS) if RATE_LIMIT_PER_MINUTE > 0 else None
+
+# Function to identify the caller by the address the trusted proxy saw. The trusted proxy is the App Service
+# front end: it sets X-Client-IP and appends the peer address (ip:port) as the last X-Forwarded-For entry.
+# Anything earlier in X-Forwarded-For comes from the client and is ignored, since it can be forged freely
+def client_key(headers):
+    forwarded = headers.get('x-client-ip') or headers.get('x-forwarded-for') or ''
+    address = forwarded.split(',')[-1].strip()
+    if address.startswith('['):
+        # [ipv6]:port
+        address = address[1:].split(']')[0]
+    elif address.count(':') == 1:
+        # ipv4:port
+        address = address.split(':')[0]
+    return address or 'anonymous'
+
+# Function to check the caller against the rate limiter, returns the seconds to wait or 0 when allowed
+def rate_limit_wait(headers):
+    if rate_limiter is None:
+        return 0
+    return rate_limiter.acquire(client_key(headers))
+
+# Function to build the 429 response for a client that is over its limit
+def too_many_requests(wait):
+    return func.HttpResponse(
+        body=json.dumps({"error": "Too many requests"}),
+        mimetype="application/json",
+        status_code=429,
+        headers={"Retry-After": str(math.ceil(wait))}
+    )
+
+# Caps the Cosmos-bound requests running at once on this worker. Up to max_queue more may wait
+# queue_timeout seconds for a slot; anything beyond that is shed straight away, so a slow Cosmos
+# cannot tie up every thread of the worker pool
+class AdmissionController:
+    def __init__(self, max_in_flight, max_queue, queue_timeout):
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self.lock = threading.Lock()
+
+    # Returns True once a slot is held, the caller must release() it
+    def acquire(self, wait=True):
+        if self.slots.acquire(blocking=False):
+            return True
+        if not wait:
+            return False
+        with self.lock:
+            if self.waiting >= self.max_queue:
+                return False
+            self.waiting += 1
+        timeout = self.queue_timeout
+        remaining = remaining_budget()
+        if remaining is not None:
+            timeout = max(0.0, min(timeout, remaining - REQUEST_DEADLINE_RESERVE_SECONDS))
+        try:
+            return self.slots.acquire(timeout=timeout)
+        finally:
+            with self.lock:
+                self.waiting -= 1
+
+    def release(self):
+        self.slots.release()
+
+admission_controller = AdmissionController(ADMISSION_MAX_IN_FLIGHT, ADMISSION_MAX_QUEUE, ADMISSION_QUEUE_TIMEOUT_SECONDS) if ADMISSION_MAX_IN_FLIGHT > 0 else None
+
+# Function to take an admission slot for a Cosmos-bound request. Returns the function that gives the
+# slot back, or None when the request should be shed. While the breaker is open requests are answered
+# from the last good copies without touching Cosmos, so they skip the limiter
+def admit(wait=True):
+    if admission_controller is None or cosmos_breaker.state == CircuitBreaker.OPEN:
+        return lambda: None
+    if not admission_controller.acquire(wait):
+        return None
+    return admission_controller.release
+
+# Function to build the 503 response for a shed request
+def overloaded():
+    return func.HttpResponse(
+        body=json.dumps({"error": "Server busy, try again shortly"}),
+        mimetype="application/json",
+        status_code=503,
+        headers={"Retry-After": "1"}
+    )
+
+# Function to build the 503 response for a request refused while the circuit breaker is open
+def unavailable():
+    return func.HttpResponse(
+        body=json.dumps({"error": "Service temporarily unavailable"}),
+        mimetype="application/json",
+        status_code=503,
+        headers={"Retry-After": str(math.ceil(cosmos_breaker.retry_after()) or 1)}
+    )
+
+# Function to build the X-Stale header naming the parts served from the last good copy
+def stale_headers(resume_stale, count_stale):
+    stale = [name for name, flag in (('resume', resume_stale), ('visitorCount', count_stale)) if flag]
+    return {"X-Stale": ", ".join(stale)} if stale else {}
+
+# Function to pick a content coding from Accept-Encoding among the offered ones, None means identity
+def negotiate_encoding(accept_encoding, offered):
+    weights = {}
+    for token in accept_encoding.lower().split(','):
+        name, _, params = token.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip()] = quality
+    best, best_quality = None, 0.0
+    for encoding in offered:
+        quality = weights.get(encoding, weights.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+# Compressed bytes per response variant. An entry is reused while the digest of the bytes it
+# was built from still matches, so a resume is compressed once per change, not once per request
+compressed_cache = OrderedDict()
+compressed_cache_lock = threading.Lock()
+
+def cached_compress(variant, encoding, data, compress):
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    key = (variant, encoding)
+    with compressed_cache_lock:
+        cached = compressed_cache.get(key)
+        if cached is not None and cached[0] == digest:
+            compressed_cache.move_to_end(key)
+            return cached[1]
+    compressed = compress(data)
+    with compressed_cache_lock:
+        compressed_cache[key] = (digest, compressed)
+        compressed_cache.move_to_end(key)
+        if len(compressed_cache) > COMPRESSION_CACHE_SIZE:
+            compressed_cache.popitem(last=False)
+    return compressed
+
+# Function to deflate one independent, byte-aligned piece of a larger stream
+def deflate_segment(data, final=False):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+# Function to gzip head + body + tail where only the small head and tail change per request.
+# Each piece is deflated on its own and ends byte aligned, so the cached deflate of the body can be
+# spliced between freshly deflated head and tail into one valid gzip member
+def gzip_spliced(variant, head, body, tail):
+    deflated_body = cached_compress(variant, 'gzip', body, deflate_segment)
+    crc = zlib.crc32(tail, zlib.crc32(body, zlib.crc32(head)))
+    return b''.join((
+        b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff',
+        deflate_segment(head),
+        deflated_body,
+        deflate_segment(tail, final=True),
+        struct.pack('<II', crc & 0xffffffff, (len(head) + len(body) + len(tail)) & 0xffffffff)
+    ))
+
+# Function to build a response whose body is head + body + tail, compressed when the client accepts it.
+# Brotli is only offered for fully static bodies since its output cannot be spliced like gzip
+def compressed_response(req, variant, body, mimetype, status_code=200, headers=None, head=b'', tail=b''):
+    headers = dict(headers or {})
+    headers['Vary'] = 'Accept-Encoding'
+    offered = ('br', 'gzip') if brotli is not None and not head and not tail else ('gzip',)
+    encoding = None
+    if len(head) + len(body) + len(tail) >= COMPRESSION_MIN_BYTES:
+        encoding = negotiate_encoding(req.headers.get('accept-encoding', ''), offered)
+    if encoding == 'br':
+        body = cached_compress(variant, 'br', body, lambda data: brotli.compress(data, quality=11))
+    elif encoding == 'gzip':
+        body = gzip_spliced(variant, head, body, tail)
+    else:
+        body = head + body + tail
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return func.HttpResponse(body=body, mimetype=mimetype, status_code=status_code, headers=headers)
+
+# Landing page assets. The stylesheet and script are minified once at startup and served under
+# content-hash names, so browsers can cache them forever and the HTML shell stays small
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+ASSET_TYPES = {'.css': 'text/css', '.js': 'application/javascript'}
+
+# Function to minify CSS: drop comments and the whitespace around punctuation
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    text = re.sub(r':\s+', ':', text)
+    return text.replace(';}', '}').strip()
+
+# Function to minify JavaScript conservatively: drop indentation, blank lines and whole-line comments.
+# Line breaks are kept so automatic semicolon insertion behaves exactly as before
+def minify_js(text):
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+# Function to load, minify and fingerprint the landing page assets, returns (assets, urls)
+def build_assets():
+    assets = {}
+    urls = {}
+    for name in ('landing.css', 'landing.js'):
+        stem, extension = os.path.splitext(name)
+        with open(os.path.join(STATIC_DIR, name), encoding='utf-8') as asset_file:
+            text = asset_file.read()
+        body = (minify_css(text) if extension == '.css' else minify_js(text)).encode()
+        fingerprinted = f'{stem}.{hashlib.sha256(body).hexdigest()[:12]}{extension}'
+        assets[fingerprinted] = (body, ASSET_TYPES[extension])
+        # Relative to /api/getresumedata, so it follows whatever route prefix the host uses
+        urls[name] = f'static/{fingerprinted}'
+    return assets, urls
+
+ASSETS, ASSET_URLS = build_assets()
+with open(os.path.join(STATIC_DIR, 'index.html'), encoding='utf-8') as index_file:
+    LANDING_PAGE = re.sub(r'\{\{(.+?)\}\}', lambda match: ASSET_URLS[match.group(1)], index_file.read()).encode()
+
+# Function to encode the envelope as (head, data, tail) so that head + data + tail is exactly
+# json.dumps(envelope, indent=4); the data part is the large one that stays the same between requests
+def encode_envelope(envelope):
+    fields = {key: value for key, value in envelope.items() if key != 'data'}
+    head = json.dumps(fields, indent=4)[:-2] + ',\n    "data": '
+    data = json.dumps(envelope['data'], indent=4).replace('\n', '\n    ')
+    return head.encode(), data.encode(), b'\n}'
+
+# Function to set the correlation fields for everything the current request logs
+def start_request_context(headers, context=None):
+    fields = {}
+    if context is not None:
+        fields['invocationId'] = context.invocation_id
+    traceparent = headers.get('traceparent')
+    if traceparent:
+        fields['traceparent'] = traceparent
+    request_context.set(fields)
+    request_deadline.set(time.monotonic() + request_budget(headers) if REQUEST_DEADLINE_SECONDS > 0 else None)
+
+# Function to pick the request's time budget in seconds. A client may ask for less than
+# REQUEST_DEADLINE_SECONDS with X-Request-Timeout-Ms, never for more
+def request_budget(headers):
+    try:
+        requested = float(headers.get('x-request-timeout-ms', '')) / 1000
+    except ValueError:
+        return REQUEST_DEADLINE_SECONDS
+    return min(REQUEST_DEADLINE_SECONDS, max(0.0, requested))
 
 # Define the function app
 app = func.FunctionApp()
 
 @app.function_name("GetResumeData")
 @app.route("getresumedata", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
-def main(req: func.HttpRequest) -> func.HttpResponse:
-    logging.info('Python HTTP trigger function processed a request.')
+def main(req: func.HttpRequest, context: func.Context = None) -> func.HttpResponse:
+    start_request_context(req.headers, context)
+    with request_span('GetResumeData', req.headers, **{'http.method': req.method, 'http.route': 'getresumedata'}) as root_span:
+        if req.params.get('profile', 'false').lower() == 'true':
+            response = profile_request(req, 'GetResumeData', get_resume_data)
+        else:
+            response = get_resume_data(req)
+        if root_span is not None:
+            root_span.set_attribute('http.status_code', response.status_code)
+        return response
 
+def get_resume_data(req):
     # Retrieve query parameters
-    resume_id = req.params.get('id')
-    lang = req.params.get('lang')
-    filter_by = req.params.get('filter')
-    theme = req.params.get('theme')
-    page = req.params.get('page')
-    page_size = req.params.get('page_size')
-
-    logging.info(f'Query parameters - ID: {resume_id}, Lang: {lang}, Filter: {filter_by}, Theme: {theme}, Page: {page}, Page Size: {page_size}')
+    with span('parse_request'):
+        resume_id = req.params.get('id')
+        lang = req.params.get('lang')
+        filter_by = req.params.get('filter')
+        theme = req.params.get('theme')
+        page = req.params.get('page')
+        page_size = req.params.get('page_size')
+        since = req.params.get('since')
+        cacheable = req.params.get('cacheable', 'false').lower() == 'true'
+
+    log_event(logging.INFO, 'request', id=resume_id, lang=lang, filter=filter_by, theme=theme, page=page, page_size=page_size, since=since, cacheable=cacheable)
 
       # Check if resume_id and lang are provided
     if not resume_id or not lang:
         # Return detailed instructions as the default response
-        detailed_instructions = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Emmanuel Resume</title>
-    <style>
-      /* Base styles */
-body {
-    font-family: Arial, sans-serif;
-    background-color: #ffffff; /* Light mode background color */
-    color: #1c1e21; /* Light mode text color */
-    margin: 0;
-    padding: 0;
-    transition: background-color 0.3s, color 0.3s;
-}
-
-body.dark-mode {
-    background-color: #1e1e1e; /* dark background color */
-    color: #ffffff; /*dark text color */
-}
-/* Footer styles */
-.footer {
-    background-color: #333;
-    color: #fff;
-    padding: 10px 0; /* Reduced padding for mobile */
-    text-align: center;
-    font-family: Arial, sans-serif; /* Optional: Adjust font family */
-}
-
-.footer-content {
-    max-width: 800px; /* Adjust max-width as needed */
-    margin: 0 auto; /* Center content horizontally */
-}
-
-.footer h4 {
-    font-size: 1rem; /* Reduced font size for mobile */
-    margin: 0; /* Remove default margin */
-    padding: 5px 0; /* Reduced padding around the text */
-    line-height: 1.2; /* Adjusted line height for mobile */
-}
-
-
-/* Responsive adjustments */
-@media (max-width: 768px) {
-    .footer {
-        padding: 8px 0; /* Adjusted padding for better spacing */
-    }
-
-    .footer h4 {
-        font-size: 0.9rem; /* Further reduce font size for smaller screens */
-        padding: 3px 0; /* Adjusted padding for better spacing */
-    }
-}
-
-
-/* Styles for the hero area */
-.hero_area {
-    padding: 4rem 2rem; /* Adjust padding as needed */
-    text-align: center; /* Center align content */
-    background-color: #f9f9f9; /* Light theme background color */
-    color: #333; /* Text color for light theme */
-}
-
-.hero_area.dark-mode {
-    background-color: #1e1e1e; /* Dark theme background color */
-    color: #ffffff; /* Text color for dark theme */
-}
-
-.hero_area img.profile-photo {
-    width: 15rem; /* Adjust the size as per your preference */
-    height: auto;
-    border-radius: 50%; /* Create a circular shape */
-    margin-bottom: 1.25rem; /* Space between photo and text */
-    transition: transform 0.3s ease; /* Smooth transition for scaling */
-}
-
-.hero_area img.profile-photo:hover {
-    transform: scale(1.1); /* Scale up to 110% on hover */
-}
-
-.hero_area h1 {
-    margin-bottom: 1.25rem;
-}
-
-.hero_area p {
-    margin-bottom: 1.875rem;
-}
-
-.hero_area .btn {
-    background-color: #333;
-    color: white;
-    border: none;
-    padding: 0.75rem 1.5rem; /* Using rem units */
-    text-decoration: none;
-    font-size: 1rem; /* Using rem units */
-    border-radius: 0.25rem;
-    cursor: pointer;
-    transition: background-color 0.3s;
-}
-
-.hero_area .btn:hover {
-    background-color: #04aa6d; /* Accent color on hover */
-}
-
-
-.service_section .row {
-    display: flex;
-    flex-wrap: wrap; /* Allow items to wrap */
-    justify-content: center; /* Center align items horizontally */
-    gap: 40px; /* Gap between containers */
-    /* padding: 40px 0; Remove padding to address blank space */
-}
-
-.service_section .col-md-6 {
-    text-align: center; /* Center align text */
-    width: calc(33.33% - 40px); /* Adjust width for responsiveness */
-    margin: 20px; /* Adjust margin for spacing */
-    background-color: #fff; /* Container background color */
-    padding: 20px; /* Padding inside container */
-    border-radius: 8px; /* Rounded corners */
-    box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1); /* Box shadow for depth */
-    transition: transform 0.3s ease, box-shadow 0.3s ease; /* Smooth transitions */
-}
-
-.service_section .col-md-6:hover {
-    transform: translateY(-5px); /* Lift container on hover */
-    box-shadow: 0 8px 16px rgba(0, 0, 0, 0.2); /* Increased shadow on hover */
-}
-
-.service_section .col-md-6 img {
-    width: 100%; /* Adjust image width */
-    max-width: 150px; /* Limit max width */
-    height: auto; /* Maintain aspect ratio */
-    border-radius: 50%; /* Rounded image */
-    display: block;
-    margin: 0 auto 15px; /* Center image and add margin below */
-    object-fit: cover; /* Ensure image covers container */
-    border: 4px solid #fff; /* White border for contrast */
-}
-
-.service_section .text-center {
-    padding: 0 15px;
-}
-
-.service_section p {
-    margin: 10px 0; /* Adjust paragraph margin */
-    font-size: 14px; /* Adjust font size */
-    line-height: 1.5; /* Adjust line height for readability */
-    color: #555; /* Text color */
-    text-align: center; /* Center align text */
-}
-
-.service_section p::after {
-    content: '';
-    display: block;
-    width: 20px;
-    height: 2px;
-
-    margin: 8px auto; /* Centered margin below text */
-}
-
-.service_section .btn {
-    display: inline-block;
-    padding: 8px 20px;
-    margin-top: 10px;
-    text-decoration: none;
-    color: #fff;
-    background-color: #007bff;
-    border: none;
-    border-radius: 4px;
-    transition: background-color 0.3s;
-    text-align: center; /* Center align button text */
-}
-
-.service_section .btn:hover {
-    background-color: #0056b3;
-}
-
-/* Responsive adjustments */
-@media (max-width: 1200px) {
-    .service_section .col-md-6 {
-        width: calc(50% - 40px); /* 2 columns on larger desktop screens */
-    }
-}
-
-@media (max-width: 768px) {
-    .service_section .col-md-6 {
-        width: calc(100% - 40px); /* 1 column on tablets and mobile */
-    }
-
-    .service_section .col-md-6 > div {
-        padding: 20px; /* Adjust padding for content inside the box */
-        margin-bottom: 20px; /* Space between stacked items */
-    }
-}
-
-/* Small Round Button */
-.small-round-button {
-    position: fixed;
-    top: 1.25rem;
-    right: 1.25rem;
-    width: 2.5rem; /* Using rem units */
-    height: 2.5rem; /* Using rem units */
-    background-color: #333;
-    color: #fff;
-    border: none;
-    border-radius: 50%;
-    cursor: pointer;
-    font-size: 1.125rem; /* Using rem units */
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    transition: background-color 0.3s;
-}
-
-.small-round-button:hover {
-    background-color: #04aa6d; /* Accent color on hover */
-} 
-
-.service_section.dark-mode .col-md-6 > div {
-    background: #333; /* Dark container background effective */
-}
-
-.service_section.dark-mode .col-md-6:hover > div {
-    background-color: #555; /* Dark grey hover effect */
-}
-.small-round-button.dark-mode {
-    background-color: #04aa6d; /* Accent color */
-    color: #1c1c1c; /* Light text */
-}
-
-.service_section.dark-mode .container,
-.service_section.dark-mode .row,
-.service_section.dark-mode .col-md-6 {
-    background-color: #333; /* Dark container background effective */
-    color: #f3f2ef; /* Dark text */
-}
-
-/* Styling for the "I am Emmanuel" heading */
-h1 {
-    font-size: 2.5rem; /* Adjust font size as needed */
-    font-weight: 700; /* Bold font weight */
-    color: var(--text-color); /* Default text color */
-    margin-bottom: 20px;
-    text-transform: uppercase; /* Uppercase text */
-    letter-spacing: 1px; /* Letter spacing for emphasis */
-    position: relative; /* Relative positioning for badge */
-    display: inline-flex; /* Inline flex for alignment */
-    align-items: center; /* Vertical alignment */
-}
-
-/* Styling for the verification badge */
-h1::after {
-    content: ""; /* Empty content for icon */
-    width: 30px; /* Badge size */
-    height: 30px; /* Badge size */
-    background-image: url('https://media.istockphoto.com/id/1396933001/vector/vector-blue-verified-badge.jpg?s=612x612&w=0&k=20&c=aBJ2JAzbOfQpv2OCSr0k8kYe0XHutOGBAJuVjvWvPrQ='); /* Verification badge image URL */
-    background-size: cover; /* Scale icon to cover dimensions */
-    background-repeat: no-repeat; /* Prevent repetition */
-    margin-left: 10px; /* Space between badge and text */
-    position: relative; /* Relative positioning for badge */
-    top: 5px; /* Adjust badge position */
-    display: inline-block; /* Make badge display inline with text */
-}
-
-/* Styling for the description */
-p {
-    font-size: 1.1rem; /* Adjust font size as needed */
-    line-height: 1.6; /* Line height for readability */
-    color: var(--text-color); /* Default text color */
-    margin-bottom: 20px;
-}
-
-/* Styling for the span element within the description */
-:root {
-    --badge-color: #0077b5; /* Define dark blue color for badge */
-}
-
-p span {
-    color: var(--badge-color); /* Use CSS variable for badge color */
-    font-weight: 700; /* Bold font weight */
-}
-/* Responsive adjustments */
-@media only screen and (max-width: 768px) {
-    h1 {
-        font-size: 2rem; /* Decrease font size for tablets */
-    }
-    h1::after {
-        width: 25px; /* Adjust badge size for tablets */
-        height: 25px; /* Adjust badge size for tablets */
-        margin-left: 8px; /* Adjust space between badge and text for tablets */
-    }
-}
-
-@media only screen and (max-width: 480px) {
-    h1 {
-        font-size: 1.8rem; /* Further decrease font size for phones */
-    }
-    h1::after {
-        width: 20px; /* Adjust badge size for phones */
-        height: 20px; /* Adjust badge size for phones */
-        margin-left: 6px; /* Adjust space between badge and text for phones */
-    }
-}
-.social li a {
-    display: flex;
-    justify-content: center;
-    align-items: center;
-    width: 40px;
-    height: 40px;
-    border-radius: 50%;
-    background-color: #333;
-    color: #fff;
-    transition: background-color 0.3s ease;
-    text-decoration: none;
-}
-
-.social {
-    list-style-type: none;
-    padding: 0;
-    display: flex;
-    justify-content: center;
-    align-items: center;
-    margin-bottom: 20px;
-}
-
-.social li {
-    margin-right: 10px;
-}
-
-.social li a {
-    display: flex;
-    justify-content: center;
-    align-items: center;
-    width: 40px;
-    height: 40px;
-    border-radius: 50%;
-    background-color: #333;
-    color: #fff;
-    transition: background-color 0.3s ease;
-    text-decoration: none;
-}
-
-.social li a:hover {
-    background-color: #555;
-}
-
-/* Specific styles for each social media link */
-.social li.twitter a {
-    background-color: #1DA1F2; /* Twitter blue */
-}
-
-.social li.linkedin a {
-    background-color: #0077B5; /* LinkedIn blue */
-}
-
-.social li.instagram a {
-    background-color: #C13584; /* Instagram pink */
-}
-
-.social li.github a {
-    background-color: #333; /* GitHub black */
-}
-
-/* SVG styles */
-.social li a svg {
-    width: 60%;
-    height: 60%;
-    fill: #fff;
-}
-
-/* CSS for the acknowledgments section */
-#acknowledgments {
-    position: relative;
-    display: flex;
-    flex-wrap: wrap;
-    justify-content: center;
-    gap: 40px; /* Gap between containers */
-    padding: 40px 0; /* Padding around the section */
-    background-color: #f9f9f9; /* Light background color for the section */
-    color: #555; /* Text color for light theme */
-}
-
-#acknowledgments.dark-mode {
-    background-color: #1e1e1e; /* Dark background color for dark theme */
-    color: #ffffff; /* Text color for dark theme */
-}
-
-#acknowledgments .container {
-    position: relative;
-    width: calc(33.33% - 40px); /* Adjust width for responsiveness */
-    margin: 20px; /* Adjust margin for spacing */
-    background-color: #ffffff; /* Lighter container background color */
-    padding: 20px; /* Padding inside container */
-    border-radius: 8px; /* Rounded corners */
-    box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1); /* Box shadow for depth */
-    transition: transform 0.3s ease, box-shadow 0.3s ease; /* Smooth transitions */
-    text-align: center; /* Center align content */
-    display: flex; /* Ensure flex layout */
-    flex-direction: column; /* Stack items vertically */
-}
-
-#acknowledgments.dark-mode .container {
-    background-color: #2e2e2e; /* Darker container background color for dark theme */
-}
-
-#acknowledgments .container:hover {
-    transform: translateY(-5px); /* Lift container on hover */
-    box-shadow: 0 8px 16px rgba(0, 0, 0, 0.2); /* Increased shadow on hover */
-}
-
-#acknowledgments img {
-    width: 100%; /* Adjust image width */
-    max-width: 150px; /* Limit max width */
-    height: auto; /* Maintain aspect ratio */
-    border-radius: 50%; /* Rounded image */
-    display: block;
-    margin: 0 auto 15px; /* Center image and add margin below */
-    object-fit: cover; /* Ensure image covers container */
-    border: 4px solid #ffffff; /* Light border for contrast */
-}
-
-#acknowledgments.dark-mode img {
-    border: 4px solid #2e2e2e; /* Dark border for contrast in dark theme */
-}
-
-#acknowledgments p {
-    margin: 10px 0; /* Adjust paragraph margin */
-    font-size: 14px; /* Adjust font size */
-    line-height: 1.5; /* Adjust line height for readability */
-}
-
-#acknowledgments.dark-mode p {
-    color: #ccc; /* Lighter text color for contrast in dark theme */
-}
-
-#acknowledgments .btn-group {
-    position: absolute;
-    bottom: 10px;
-    left: 50%;
-    transform: translateX(-50%);
-    display: flex;
-    justify-content: center;
-}
-
-#acknowledgments .btn-group .indicator {
-    width: 8px;
-    height: 8px;
-    border-radius: 50%;
-    background-color: #ccc; /* Indicator color for light theme */
-    margin: 0 5px;
-    cursor: pointer;
-    transition: background-color 0.3s;
-}
-
-#acknowledgments.dark-mode .btn-group .indicator {
-    background-color: #888; /* Adjusted indicator color for dark theme */
-}
-
-#acknowledgments .btn-group .indicator.active {
-    background-color: #007bff; /* Active indicator color */
-}
-
-#acknowledgments .container a {
-    display: inline-block;
-    padding: 8px 20px;
-    margin-top: auto; /* Push links to the bottom */
-    text-decoration: none;
-    color: #ffffff;
-    background-color: #007bff;
-    border: none;
-    border-radius: 4px;
-    transition: background-color 0.3s;
-}
-
-#acknowledgments .container a:hover {
-    background-color: #0056b3;
-}
-
-/* Responsive adjustments */
-@media (max-width: 1200px) {
-    #acknowledgments .container {
-        width: calc(50% - 40px); /* 2 columns on larger desktop screens */
-    }
-}
-
-@media (max-width: 768px) {
-    #acknowledgments .container {
-        width: calc(100% - 40px); /* 1 column on tablets and mobile */
-    }
-}
-  /* Optional: Add CSS for active link styling */
-  .navbar {
-            background-color: #333;
-            overflow: hidden;
-        }
-        .navbar a {
-            float: left;
-            display: block;
-            color: white;
-            text-align: center;
-            padding: 14px 20px;
-            text-decoration: none;
-            font-size: 17px;
-        }
-        .navbar a:hover {
-            background-color: #ddd;
-            color: black;
-        }
-        .navbar a.active {
-            background-color: #04AA6D;
-            color: white;
-        }
-        /* Optional: Smooth scrolling */
-        html {
-            scroll-behavior: smooth;
-        }
-/* Navbar styles */
-.navbar {
-    background-color: #333;
-    overflow: hidden;
-}
-
-.navbar a {
-    float: left;
-    display: block;
-    color: white;
-    text-align: center;
-    padding: 14px 20px;
-    text-decoration: none;
-    font-size: 17px;
-}
-
-.navbar a:hover {
-    background-color: #ddd;
-    color: black;
-}
-
-.navbar a.active {
-    background-color: #6d7c77;
-    color: white;
-}
-
-/* Hero Area styles effective*/
-.hero_area {
-    text-align: center;
-    padding: 80px 20px;
-    color: #333;
-    display: flex;
-    flex-direction: column;
-    align-items: center;
-}
-
-.hero_area img.profile-photo {
-    width: 250px;
-    height: auto;
-    border-radius: 50%;
-    margin-bottom: 20px;
-    transition: transform 0.3s ease;
-}
-
-.hero_area img.profile-photo:hover {
-    transform: scale(1.1);
-}
-
-.hero_area h1 {
-    margin-bottom: 20px;
-}
-
-.hero_area p {
-    margin-bottom: 30px;
-}
-
-
-.hero_area h1 {
-    margin-bottom: 1.25rem;
-}
-
-.hero_area p {
-    margin-bottom: 1.875rem;
-}
-
-
-.hero_area .btn:hover {
-    background-color: #04aa6d; /* Accent color on hover for both themes */
-}
-
-.hero_area.dark-mode .btn {
-    background-color: #0a66c2; /* Dark theme background color */
-}
-
-.hero_area.dark-mode .btn:hover {
-    background-color: #1d9bd1; /* Dark theme accent color on hover  */
-}
-
-
-/* CSS for the service section new */
-.service_section {
-    position: relative;
-    display: flex;
-    flex-wrap: wrap;
-    justify-content: center;
-    gap: 40px; /* Gap between containers */
-    padding: 40px 0; /* Padding around the section */
-    background-color: #f9f9f9; /* Light background color for the section */
-    color: #555; /* Text color for light theme */
-    border-radius: 12px; /* Rounded corners for the section */
-    box-shadow: 0 4px 12px rgba(0, 0, 0, 0.1); /* Soft shadow */
-    overflow: hidden; /* Ensure shadow doesn't overflow */
-}
-
-.service_section.dark-mode {
-    background-color: #1e1e1e; /* Dark background color for dark theme */
-    color: #ffffff; /* Text color for dark theme */
-    box-shadow: 0 4px 12px rgba(0, 0, 0, 0.4); /* Darker shadow for dark theme */
-}
-
-.service_section .container {
-    position: relative;
-    width: calc(33.33% - 40px); /* Adjust width for responsiveness */
-    margin: 20px; /* Adjust margin for spacing */
-    background-color: #ffffff; /* Lighter container background color */
-    padding: 20px; /* Padding inside container */
-    border-radius: 8px; /* Rounded corners */
-    box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1); /* Box shadow for depth */
-    transition: transform 0.3s ease, box-shadow 0.3s ease; /* Smooth transitions */
-    text-align: center; /* Center align content */
-    display: flex; /* Ensure flex layout */
-    flex-direction: column; /* Stack items vertically */
-}
-
-.service_section.dark-mode .container {
-    background-color: #2e2e2e; /* Darker container background color for dark theme */
-    box-shadow: 0 4px 8px rgba(0, 0, 0, 0.3); /* Darker shadow for dark theme */
-}
-
-.service_section .container:hover {
-    transform: translateY(-5px); /* Lift container on hover */
-    box-shadow: 0 8px 16px rgba(0, 0, 0, 0.2); /* Increased shadow on hover */
-}
-
-.service_section img {
-    width: 100%; /* Adjust image width */
-    max-width: 150px; /* Limit max width */
-    height: auto; /* Maintain aspect ratio */
-    border-radius: 50%; /* Rounded image */
-    display: block;
-    margin: 0 auto 15px; /* Center image and add margin below */
-    object-fit: cover; /* Ensure image covers container */
-    border: 4px solid #ffffff; /* Light border for contrast */
-    transition: transform 0.3s ease; /* Smooth image transition */
-}
-
-.service_section.dark-mode img {
-    border: 4px solid #2e2e2e; /* Dark border for contrast in dark theme */
-}
-
-.service_section img:hover {
-    transform: scale(1.05); /* Scale up image on hover */
-}
-
-.service_section p {
-    margin: 10px 0; /* Adjust paragraph margin */
-    font-size: 16px; /* Increased font size */
-    line-height: 1.6; /* Adjusted line height for readability */
-}
-
-.service_section.dark-mode p {
-    color: #ccc; /* Lighter text color for contrast in dark theme */
-}
-
-.service_section .btn-group {
-    position: absolute;
-    bottom: 10px;
-    left: 50%;
-    transform: translateX(-50%);
-    display: flex;
-    justify-content: center;
-}
-
-.service_section .btn-group .indicator {
-    width: 8px;
-    height: 8px;
-    border-radius: 50%;
-    background-color: #ccc; /* Indicator color for light theme */
-    margin: 0 5px;
-    cursor: pointer;
-    transition: background-color 0.3s;
-}
-
-.service_section.dark-mode .btn-group .indicator {
-    background-color: #888; /* Adjusted indicator color for dark theme */
-}
-
-.service_section .btn-group .indicator.active {
-    background-color: #007bff; /* Active indicator color */
-}
-
-.service_section .container a {
-    display: inline-block;
-    padding: 10px 24px;
-    margin-top: auto; /* Push links to the bottom */
-    text-decoration: none;
-    color: #ffffff;
-    background-color: #007bff;
-    border: none;
-    border-radius: 6px;
-    transition: background-color 0.3s, transform 0.2s;
-}
-
-.service_section .container a:hover {
-    background-color: #0056b3;
-    transform: translateY(-3px); /* Lift button on hover */
-}
-/* Gradient Overlay */
-.service_section .container::before {
-    content: '';
-    position: absolute;
-    top: 0;
-    left: 0;
-    width: 100%;
-    height: 100%;
-    background: linear-gradient(180deg, rgba(0,0,0,0) 0%, rgba(0,0,0,0.5) 100%);
-    opacity: 0;
-    transition: opacity 0.3s ease;
-    pointer-events: none;
-}
-/* Responsive adjustments */
-@media (max-width: 1200px) {
-    .service_section .container {
-        width: calc(50% - 40px); /* 2 columns on larger desktop screens */
-    }
-}
-
-@media (max-width: 768px) {
-    .service_section .container {
-        width: calc(100% - 40px); /* 1 column on tablets and mobile */
-    }
-}
-
-
-/* Small Round Button */
-.small-round-button {
-    position: fixed;
-    top: 20px;
-    right: 20px;
-    width: 40px;
-    height: 40px;
-    background-color: #333;
-    color: #fff;
-    border: none;
-    border-radius: 50%;
-    cursor: pointer;
-    font-size: 18px;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    transition: background-color 0.3s;
-}
-.small-round-button:hover {
-    background-color: #04aa6d;
-}
-
-/* Dark Mode Styles */
-body.dark-mode {
-    background-color: var(--background-color-dark);
-    color: var(--text-color-dark);
-}
-
-.navbar.dark-mode {
-    background-color: #fff; /* Light theme background color */
-}
-
-.navbar.dark-mode a.dark-mode {
-    color: #1c1c1c; /* Dark theme text color */
-}
-
-.navbar a.active.dark-mode {
-    background-color: #3e4914;
-}
-
-.hero_area.dark-mode {
-    background-color: #444;
-    color: var(--text-color-dark);
-}
-
-.hero_area .btn.dark-mode {
-    background-color: #000000;
-}
-
-.hero_area.dark-mode {
-    background-color: #1e1e1e; /* Matching dark background color */
-    color: #ffffff; /* White text color */
-}
-
-.hero_area .btn.dark-mode {
-    background-color: #0077b5; /*  blue button color */
-    color: #ffffff; /* White text color */
-}
-.small-round-button.dark-mode {
-    background-color: #0077b5; /* blue button color */
-    color: #ffffff; /* White text color */
-}
-</style>
-</head>
-<body>
-<!-- Navbar -->
-<div class="navbar">
-    <a href="#hero">Home</a>
-    <a href="#acknowledgments">Recognition</a>
-    <a href="#resume">Resume</a>
-</div>
-<!-- Hero Area -->
-<div class="hero_area" id="hero">
-    <img src="https://media.licdn.com/dms/image/D4E03AQEM6U3b39k-MQ/profile-displayphoto-shrink_800_800/0/1718211515117?e=1726099200&v=beta&t=KudN_sRlpo2jSag5KsLFCzJUXrEPPxlzJgI5QQ6oRB0" alt="Emmanuel's Photo" class="profile-photo">
-    <h1>Hi, I'm Emmanuel</h1>
-    <p>Visitor Count: <span id="visitorCount">Loading...</span></p>
-
-    <!-- Social Media Links -->
-    <ul class="social">
-        <li class="twitter"><a href="https://twitter.com/oyeniyi-emmanuel"><svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24"><path d="M23.94 4.57c-.88.38-1.82.64-2.8.76 1.01-.6 1.78-1.54 2.15-2.67-.94.55-1.98.95-3.1 1.17-.89-.95-2.17-1.54-3.58-1.54-2.71 0-4.9 2.19-4.9 4.9 0 .38.04.75.13 1.1-4.08-.2-7.7-2.15-10.12-5.11-.42.72-.66 1.56-.66 2.45 0 1.7.86 3.19 2.17 4.07-.8 0-1.54-.25-2.2-.63v.06c0 2.37 1.68 4.34 3.92 4.78-.42.12-.87.18-1.33.18-.32 0-.64-.03-.95-.08.64 1.98 2.51 3.42 4.72 3.46-1.73 1.35-3.92 2.15-6.31 2.15-.41 0-.82-.02-1.23-.07 2.25 1.44 4.93 2.28 7.8 2.28 9.36 0 14.49-7.75 14.49-14.49 0-.22 0-.45-.02-.67.99-.71 1.85-1.6 2.54-2.61z"/></svg></a></li>
-        <li class="linkedin"><a href="https://linkedin.com/in/oyeniyi-emmanuel"><svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24"><path d="M20 2H4C2.9 2 2.01 2.9 2.01 4L2 20c0 1.1.89 2 1.99 2H20c1.1 0 2-0.9 2-2V4c0-1.1-0.9-2-2-2zM8 18H5V9h3v9zM6.5 7.5c-0.83 0-1.5-0.67-1.5-1.5s0.67-1.5 1.5-1.5 1.5 0.67 1.5 1.5-0.67 1.5-1.5 1.5zM18 18h-2.99v-4.5c0-1.22-0.47-1.91-1.38-1.91-0.75 0-1.2 0.5-1.4 1h0V18h-3V9h2.98v1.2c0.36-0.55 1-1.2 2.3-1.2 1.68 0 3 1.09 3 3.42V18z"/></svg></a></li>
-        <li class="instagram"><a href="https://instagram.com/oyeniyi-emmanuel"><svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24"><path d="M11.997 2.04c-2.722 0-3.056 0.011-4.122 0.06-1.064 0.048-1.79 0.217-2.426 0.463a4.901 4.901 0 0 0-1.771 1.151 4.898 4.898 0 0 0-1.152 1.77c-0.247 0.635-0.415 1.36-0.464 2.424C2.011 8.94 2 9.274 2 12s0.011 3.056 0.06 4.122c0.049 1.064 0.217 1.79 0.464 2.426a4.898 4.898 0 0 0 1.151 1.771 4.901 4.901 0 0 0 1.77 1.152c0.635 0.247 1.36 0.415 2.424 0.464 1.066 0.048 1.4 0.06 4.122 0.06s3.056-0.011 4.122-0.06c1.064-0.049 1.79-0.217 2.426-0.464a4.901 4.901 0 0 0 1.771-1.151 4.898 4.898 0 0 0 1.152-1.77c0.247-0.636 0.415-1.362 0.464-2.426 0.049-1.066 0.06-1.4 0.06-4.122s-0.011-3.056-0.06-4.122c-0.049-1.064-0.217-1.79-0.464-2.424a4.898 4.898 0 0 0-1.151-1.771 4.901 4.901 0 0 0-1.77-1.152c-0.636-0.247-1.362-0.415-2.426-0.464C15.053 2.011 14.719 2 11.997 2zM12 6.851c2.627 0 3.152 0.011 4.248 0.057 0.934 0.043 1.444 0.198 1.76 0.331 0.442 0.172 0.76 0.383 1.095 0.718 0.335 0.335 0.546 0.653 0.718 1.095 0.133 0.316 0.288 0.826 0.331 1.76 0.046 1.095 0.057 1.62 0.057 4.248s-0.011 3.152-0.057 4.248c-0.043 0.934-0.198 1.444-0.331 1.76-0.172 0.442-0.383 0.76-0.718 1.095-0.335 0.335-0.653 0.546-1.095 0.718-0.316 0.133-0.826 0.288-1.76 0.331-1.096 0.046-1.621 0.057-4.248 0.057s-3.152-0.011-4.248-0.057c-0.934-0.043-1.444-0.198-1.76-0.331-0.442-0.172-0.76-0.383-1.095-0.718-0.335-0.335-0.546-0.653-0.718-1.095-0.133-0.316-0.288-0.826-0.331-1.76-0.046-1.095-0.057-1.62-0.057-4.248s0.011-3.152 0.057-4.248c0.043-0.934 0.198-1.444 0.331-1.76 0.172-0.442 0.383-0.76 0.718-1.095 0.335-0.335 0.653-0.546 1.095-0.718 0.316-0.133 0.826-0.288 1.76-0.331 1.096-0.046 1.621-0.057 4.248-0.057zM12 9.943c-2.628 0-4.757 2.129-4.757 4.757s2.129 4.757 4.757 4.757 4.757-2.129 4.757-4.757-2.129-4.757-4.757-4.757zM12 17c-1.657 0-3-1.343-3-3s1.343-3 3-3 3 1.343 3 3-1.343 3-3 3z"/></svg></a></li>
-        <li class="github"><a href="https://github.com/Emmanuel1930"><svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24"><path d="M12 2C6.477 2 2 6.477 2 12c0 4.418 2.865 8.17 6.839 9.491 0.5 0.092 0.682-0.218 0.682-0.482 0-0.238-0.009-0.868-0.014-1.705-2.782 0.602-3.368-1.34-3.368-1.34-0.454-1.154-1.11-1.463-1.11-1.463-0.908-0.621 0.068-0.607 0.068-0.607 1.004 0.071 1.531 1.032 1.531 1.032 0.891 1.527 2.338 1.086 2.911 0.831 0.091-0.646 0.349-1.086 0.634-1.336-2.22-0.253-4.555-1.107-4.555-4.931 0-1.089 0.39-1.982 1.032-2.682-0.104-0.253-0.447-1.268 0.098-2.644 0 0 0.837-0.268 2.743 1.024 0.796-0.221 1.649-0.331 2.497-0.335 0.848 0.004 1.701 0.114 2.497 0.335 1.906-1.292 2.742-1.024 2.742-1.024 0.547 1.376 0.204 2.391 0.1 2.644 0.645 0.7 1.03 1.593 1.03 2.682 0 3.834-2.339 4.674-4.565 4.922 0.36 0.308 0.681 0.918 0.681 1.849 0 1.335-0.012 2.412-0.012 2.74 0 0.267 0.18 0.577 0.688 0.479 3.97-1.322 6.832-5.075 6.832-9.49 0-5.523-4.477-10-10-10z"/></svg></a></li>
-    </ul>
-
-    <p>A student from Redeemer's University in Nigeria with a passion for Cloud Security.
-        Welcome to my <span>Cloud Resume API Challenge</span>, where I'll be showcasing my skills in Azure.
-        I'm excited to share my project with you, which now includes additional features that
-        take my cloud resume to the next level.
-    </p>
-    
-    <a href="#resume" class="btn">JSON Resume-focused project </a>
-</div>
-
-<section class="service_section">
-    <div class="container" id="resume">
-        <h2 class="text-center">Resume</h2>
-        <p class="text-center">Additional Features of My JSON Resume</p>
-        <div class="row">
-            <div class="col-md-6">
-                <div class="feature-item">
-                    <h5>Resume ID and Language Selection (English)</h5>
-                    <p>Access the resume in English by adding <code>?id=json&lang=en</code> to the URL.</p>
-                    <a href="https://azureresumeapp.azurewebsites.net/api/getresumedata?id=json&lang=en" class="btn btn-primary">View in English <i class="fa fa-long-arrow-right" aria-hidden="true"></i></a>
-                </div>
-            </div>
-            <div class="col-md-6">
-                <div class="feature-item">
-                    <h5>Resume ID and Language Selection (French)</h5>
-                    <p>Access the resume in French by replacing <code>en</code> with <code>fr</code> in the URL: <code>?id=json&lang=fr</code></p>
-                    <a href="https://azureresumeapp.azurewebsites.net/api/getresumedata?id=json&lang=fr" class="btn btn-primary">View in French <i class="fa fa-long-arrow-right" aria-hidden="true"></i></a>
-                </div>
-            </div>
-        </div>
-        <div class="row">
-            <div class="col-md-6">
-                <div class="feature-item">
-                    <h5>Condition Check: Verifies if the theme parameter matches 'minimal'</h5>
-                    <p>Filtering Logic: When the theme is 'minimal', only the specified sections will be included.</p>
-                    <a href="https://azureresumeapp.azurewebsites.net/api/getresumedata?id=json&lang=en&theme=minimal" class="btn btn-link">Learn more about minimal theme <i class="fa fa-long-arrow-right" aria-hidden="true"></i></a>
-                </div>
-            </div>
-            <div class="col-md-6">
-                <div class="feature-item">
-                    <h5>Creating a Unique Theme: New theme parameter added</h5>
-                    <p>Optimization of the current view, the use of the azure links, and even if it's a head.</p>
-                    <a href="https://azureresumeapp.azurewebsites.net/api/getresumedata?id=json&lang=en&page=1&page_size=4" class="btn btn-link">Learn about themes <i class="fa fa-long-arrow-right" aria-hidden="true"></i></a>
-                </div>
-            </div>
-        </div>
-    </div>
-</section>
-<!-- Acknowledgements SECTION -->
-<section id="acknowledgments">
-    <div class="container">
-        <div class="heading-container">
-            <h2>Acknowledgment</h2>
-        </div>
-        <img src="https://media.licdn.com/dms/image/D4D03AQHjPA4qXF_y3A/profile-displayphoto-shrink_800_800/0/1702391535993?e=1726099200&amp;v=beta&amp;t=raFd166JfF6qJ7gpVENkOQM5DHSQDIRRGQbDNNo3gAg" alt="Inspiration 1">
-        <p>I extend my gratitude to Rishab Kumar for proposing the idea of building the Azure Resume API. 
-            His initiative has made this project both challenging and rewarding.
-        </p>
-        <a href="https://www.linkedin.com/in/rishabkumar7/" target="_blank" class="btn">LinkedIn Profile</a>
-    </div>
-
-    <div class="container">
-        <div class="heading-container">
-            <h2>Acknowledgment</h2>
-        </div>
-        <img src="https://media.licdn.com/dms/image/D5603AQGkFSBgLveJLw/profile-displayphoto-shrink_200_200/0/1687909984859?e=1726099200&amp;v=beta&amp;t=Do3OFxEpt0plNSq-IGBbC3h2lP037RLrErPqaKZBN9s" alt="Inspiration 2" class="round-image">
-        <p>I am grateful to Ifeanyi Otuonye for co-creating the Azure 
-           Resume API project alongside Rishab Kumar.It has been an enriching experience.
-        </p>
-        <a href="https://www.linkedin.com/in/ifeanyi-otuonye/" target="_blank" class="btn">LinkedIn Profile</a>
-    </div>
-
-    <div class="container">
-        <div class="heading-container">
-            <h2>Acknowledgment</h2>
-        </div>
-        <img src="https://media.licdn.com/dms/image/D4E03AQESBZGLHHi8yg/profile-displayphoto-shrink_200_200/0/1714561859900?e=1726099200&amp;v=beta&amp;t=gu2lD6OFCGdowHP8IuVHr5qAmp-7J55NC-jM_pk5gx8" alt="Inspiration 3" class="round-image">
-        <p>I also want to thank Gwyneth Peña for creating a comprehensive 6-month cloud security study plan. 
-            This plan has significantly contributed to my skill development in this area.
-        </p>
-        <a href="https://www.linkedin.com/in/madebygps/" target="_blank" class="btn">LinkedIn Profile</a>
-    </div>
-
-    <div class="container">
-        <div class="heading-container">
-            <h2>Acknowledgment</h2>
-        </div>
-        <img src="https://avatars.githubusercontent.com/u/99533069?v=4" alt="Pelumi Adetoye">
-        <p>I express my gratitude to Miss Pelz for her invaluable guidance and support throughout this project. 
-           Her mentorship has been crucial in overcoming challenges and achieving progress.
-        </p>
-        <a href="https://www.linkedin.com/in/oluwapelumiadetoye/" target="_blank" class="btn">LinkedIn Profile</a>
-    </div>
-
-    <!-- Navigation indicators -->
-    <div class="btn-group">
-        <!-- Indicator buttons will be dynamically added here via JavaScript -->
-    </div>
-</section>
-
-<!--footer section-->
-<footer role="contentinfo" class="footer">
-        <div class="footer">
-            <h4> © 2024 Emmanuel Cloud Resume API with Azure</h4>
-        </div>
-</footer>
-
-
-<!-- Small Round Button for Dark Mode Toggle -->
-<button class="small-round-button" onclick="toggleDarkMode()">☀</button>
-
-
-<!-- JavaScript for Dark Mode Toggle and Inspirations Slideshow -->
-<script>
-    // Dark Mode Toggle Function
-    function toggleDarkMode() {
-        document.body.classList.toggle('dark-mode');
-        document.querySelectorAll('.navbar').forEach(el => el.classList.toggle('dark-mode'));
-        document.querySelectorAll('.navbar a').forEach(a => a.classList.toggle('dark-mode'));
-        document.querySelector('.hero_area').classList.toggle('dark-mode');
-        document.querySelector('.hero_area .btn').classList.toggle('dark-mode');
-        document.querySelector('.service_section').classList.toggle('dark-mode');
-        document.querySelectorAll('.service_section .col-md-6 > div').forEach(div => div.classList.toggle('dark-mode'));
-        document.querySelector('#acknowledgments').classList.toggle('dark-mode'); // Toggle dark mode for acknowledgments section
-        document.querySelectorAll('#acknowledgments .container').forEach(container => container.classList.toggle('dark-mode')); // Toggle dark mode for containers in acknowledgments section
-        document.querySelector('.footer').classList.toggle('dark-mode');
-        document.querySelector('.small-round-button').classList.toggle('dark-mode');
-    }
-
-    // Acknowledgments Slideshow Function
-    document.addEventListener('DOMContentLoaded', function () {
-        const containers = document.querySelectorAll('#acknowledgments .container');
-        const indicatorsContainer = document.querySelector('#acknowledgments .btn-group');
-        let index = 0;
-
-        function showContainer(idx) {
-            containers.forEach(container => {
-                container.style.display = 'none';
-            });
-
-            containers[idx].style.display = 'block';
-            updateIndicators(idx);
-        }
-
-        function updateIndicators(currentIndex) {
-            const indicators = Array.from(indicatorsContainer.children);
-
-            indicators.forEach((indicator, idx) => {
-                if (idx === currentIndex) {
-                    indicator.classList.add('active');
-                } else {
-                    indicator.classList.remove('active');
-                }
-            });
-        }
-
-        function goToContainer(idx) {
-            index = idx;
-            showContainer(index);
-        }
-
-        // Create indicators
-        containers.forEach((_, idx) => {
-            const indicator = document.createElement('div');
-            indicator.classList.add('indicator');
-            if (idx === 0) {
-                indicator.classList.add('active');
-            }
-            indicator.addEventListener('click', () => goToContainer(idx));
-            indicatorsContainer.appendChild(indicator);
-        });
-
-        // Automatic slideshow
-        function startSlideshow() {
-            showContainer(index);
-            index = (index + 1) % containers.length;
-            setTimeout(startSlideshow, 4000); // 4000 milliseconds = 4 seconds
-        }
-
-        // Start the slideshow
-        startSlideshow();
-    });
-
-    // Fetch visitor count and update it
-    async function fetchVisitorCount() {
-        try {
-            const response = await fetch('https://azureresumeapp.azurewebsites.net/api/getresumedata?id=json&lang=en');
-            const data = await response.json();
-            document.getElementById('visitorCount').textContent = data.visitorCount;
-        } catch (error) {
-            console.error('Error fetching visitor count:', error);
-            document.getElementById('visitorCount').textContent = 'Error loading count';
-        }
-    }
-
-    // Increase visitor count
-    async function increaseVisitorCount() {
-        try {
-            await fetch('https://azureresumeapp.azurewebsites.net/api/getresumedata?id=json&lang=en', {
-                method: 'POST'
-            });
-        } catch (error) {
-            console.error('Error incrementing visitor count:', error);
-        }
-    }
-
-    // Call the function to fetch the visitor count and increase the count when the page loads
-    document.addEventListener('DOMContentLoaded', () => {
-        fetchVisitorCount();
-        increaseVisitorCount();
-    });
-</script>
-</body>
-</html>
-        """
-        return func.HttpResponse(
-            body=detailed_instructions,
-            mimetype="text/html",
-            status_code=200
-        )
+        return compressed_response(req, 'landing', LANDING_PAGE, "text/html")
+
+    # The landing page above is static and never reaches Cosmos, so only the data path is rate limited.
+    # Cacheable requests come from CDN edge nodes, and one edge node fetches and revalidates for every
+    # viewer behind it, so they are left to admission control instead of a per-client bucket
+    wait = rate_limit_wait(req.headers) if not cacheable else 0
+    if wait:
+        log_event(logging.WARNING, 'rate_limited', client=client_key(req.headers))
+        return too_many_requests(wait)
+
+    # A request answered from memory skips the limiter: the resume is in the shared cache and, unless
+    # the response is cacheable, the visitor was already counted and the count is fresh
+    cached = shared_resume((resume_id, lang, filter_by))
+    if cached is not None and (cacheable or count_is_fresh() and visitor_counted(visitor_fingerprint(req.headers))):
+        return serve_resume(req, resume_id, lang, filter_by, theme, page, page_size, since, cacheable, cached)
+
+    release = admit()
+    if release is None:
+        log_event(logging.WARNING, 'request_shed', id=resume_id, lang=lang)
+        return overloaded()
+    try:
+        return serve_resume(req, resume_id, lang, filter_by, theme, page, page_size, since, cacheable, cached)
+    finally:
+        release()
 
+# cached is a copy already taken from the shared cache, so the resume is not looked up twice
+def serve_resume(req, resume_id, lang, filter_by, theme, page, page_size, since=None, cacheable=False, cached=None):
     # Proceed with retrieving resume data if resume_id and lang are provided
     try:
-        query = f"SELECT c FROM c WHERE c.id = '{resume_id}' AND c.lang = '{lang}'"
-        if filter_by:
-            query += f" AND ARRAY_CONTAINS(c.sections, '{{\"type\": \"{filter_by}\"}}')"
-        items = list(container.query_items(query=query, enable_cross_partition_query=True))
-
-        if items:
-            resume_data = items[0]['c']
-            logging.info(f'Resume found: {resume_data}')
-
-            # Remove the specified sections
-            keys_to_remove = ['_rid', '_self', '_etag', '_attachments', '_ts', 'id', 'lang', 'sections', 'count']
-            for key in keys_to_remove:
-                resume_data.pop(key, None)
-
-            # Apply theme filtering
-            if theme == 'minimal':
-                resume_data = {
-                    'basics': resume_data.get('basics', {}),
-                    'work': resume_data.get('work', [])
-                }
-            # Add pagination if requested
-            if page and page_size:
-                try:
-                    page = int(page)
-                    page_size = int(page_size)
-                    start_index = (page - 1) * page_size
-                    end_index = start_index + page_size
-                    resume_data = resume_data['work'][start_index:end_index]  # Adjusted for 'work' section
-                except ValueError:
-                    logging.error('Invalid page or page size')
-                    return func.HttpResponse(
-                        body=json.dumps({"error": "Invalid page or page size"}),
-                        mimetype="application/json",
-                        status_code=400
-                    )
+        resume_data, resume_stale = (cached, False) if cached is not None else get_resume(resume_id, lang, filter_by)
+
+        if resume_data is not None:
+            log_event(logging.INFO, 'resume_found', id=resume_id, lang=lang, stale=resume_stale, fields=len(resume_data))
+
+            # A client that sends the version it holds gets a JSON Patch from that version when it is
+            # still in the history, and the full body otherwise
+            version = resume_version(resume_data)
+            base = find_version((resume_id, lang, filter_by), since) if since and not cacheable else None
+            try:
+                resume_data = shape_resume(resume_data, theme, page, page_size)
+                if base is not None:
+                    with span('diff', since=since):
+                        resume_data = json_patch(shape_resume(base, theme, page, page_size), resume_data)
+            except ValueError:
+                log_event(logging.ERROR, 'invalid_page', page=page, page_size=page_size)
+                return func.HttpResponse(
+                    body=json.dumps({"error": "Invalid page or page size"}),
+                    mimetype="application/json",
+                    status_code=400
+                )
+
+            if cacheable:
+                return cacheable_response(req, (resume_id, lang, filter_by, theme, page, page_size), resume_data, version, resume_stale)
 
             # Increment visitor count
-            increment_visitor_count()
-            visitor_count = get_visitor_count()
+            increment_visitor_count(visitor_fingerprint(req.headers))
+            visitor_count, count_stale = get_visitor_count()
 
-            # Add metadata
-            timestamp_now = datetime.utcnow().isoformat() + "Z"
-            response_message = f"Oyeniyi Emmanuel resume retrieved successfully. Kudos to the organizers (Rishab Kumar and Ifeanyi Otuonye)!"
+            response_data = build_envelope(visitor_count, resume_data)
 
-            response_data = {
-                "message": response_message,
-                "timestamp": timestamp_now,
-                "visitorCount": visitor_count,
-                "data": resume_data
-            }
+            headers = stale_headers(resume_stale, count_stale)
+            if version is not None:
+                headers['X-Resume-Version'] = version
+            if base is not None:
+                headers['X-Resume-Delta'] = since
 
             # Return pretty-printed JSON response
-            return func.HttpResponse(
-                body=json.dumps(response_data, indent=4),
-                mimetype="application/json",
-                status_code=200
-            )
+            with span('serialize'):
+                head, body, tail = encode_envelope(response_data)
+                variant = ('resume', resume_id, lang, filter_by, theme, page, page_size, since if base is not None else None)
+                return compressed_response(req, variant, body, "application/json", headers=headers, head=head, tail=tail)
         else:
-            logging.error(f'Resume not found - ID: {resume_id}, Lang: {lang}')
+            log_event(logging.ERROR, 'resume_not_found', id=resume_id, lang=lang)
             return func.HttpResponse(
                 body=json.dumps({"error": "Resume not found"}),
                 mimetype="application/json",
                 status_code=404
             )
     except exceptions.CosmosResourceNotFoundError:
-        logging.error(f'Resume not found - ID: {resume_id}, Lang: {lang}')
+        log_event(logging.ERROR, 'resume_not_found', id=resume_id, lang=lang)
         return func.HttpResponse(
             body=json.dumps({"error": "Resume not found"}),
             mimetype="application/json",
             status_code=404
         )
+    except (DeadlineExceededError, exceptions.CosmosClientTimeoutError):
+        log_event(logging.ERROR, 'resume_deadline_exceeded', id=resume_id, lang=lang)
+        return func.HttpResponse(
+            body=json.dumps({"error": "Request deadline exceeded"}),
+            mimetype="application/json",
+            status_code=504
+        )
+    except CircuitOpenError:
+        log_event(logging.ERROR, 'resume_unavailable', id=resume_id, lang=lang)
+        return unavailable()
     except Exception as e:
-        logging.error(f'Error retrieving resume: {str(e)}')
+        log_event(logging.ERROR, 'resume_read_failed', id=resume_id, lang=lang, error=e)
         return func.HttpResponse(
             body=json.dumps({"error": "Internal server error"}),
             mimetype="application/json",
             status_code=500
-        )
\ No newline at end of file
+        )
+
+# Function to build the response for cacheable=true: a body that only changes with the resume, an ETag
+# derived from it, and headers letting browsers and a CDN keep it. The visitor count is left to the
+# visitorcount route, since a cached copy can neither show nor count a visit
+def cacheable_response(req, variant, resume_data, version, resume_stale):
+    body = json.dumps(build_cacheable_envelope(resume_data), indent=4).encode()
+    # Weak, because the gzip and identity encodings of the body share it
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = stale_headers(resume_stale, False)
+    headers.update({
+        "ETag": etag,
+        "Surrogate-Key": " ".join(surrogate_keys(variant[0], variant[1])),
+        # A copy served from the last good data must not outlive the outage at the edge
+        "Cache-Control": "no-cache" if resume_stale else
+        f"public, max-age={EDGE_CACHE_MAX_AGE_SECONDS}, s-maxage={EDGE_CACHE_SHARED_MAX_AGE_SECONDS}"
+    })
+    if version is not None:
+        headers['X-Resume-Version'] = version
+    # If-None-Match uses the weak comparison, so a W/ prefix on either side is ignored
+    if etag[2:] in [tag.strip().removeprefix('W/') for tag in req.headers.get('if-none-match', '').split(',')]:
+        headers['Vary'] = 'Accept-Encoding'
+        return func.HttpResponse(status_code=304, headers=headers)
+    return compressed_response(req, ('cacheable',) + variant, body, "application/json", headers=headers)
+
+# Only one request is profiled at a time: the profiler hooks are per interpreter on newer Pythons
+profile_lock = threading.Lock()
+
+# Function to run one request under cProfile for an operator holding PROFILING_KEY (X-Profile-Key header).
+# The response is the profile instead of the resume: per-stage wall times, the same stages as folded
+# stacks in microseconds of self time (flamegraph.pl / speedscope input), and the costliest functions.
+# The raw pstats file is kept in the temp directory for snakeviz or pstats
+def profile_request(req, name, handler):
+    if not PROFILING_KEY or not hmac.compare_digest(req.headers.get('x-profile-key', '').encode(), PROFILING_KEY.encode()):
+        log_event(logging.WARNING, 'profile_denied', client=client_key(req.headers))
+        return func.HttpResponse(
+            body=json.dumps({"error": "Profiling requires a valid X-Profile-Key"}),
+            mimetype="application/json",
+            status_code=403
+        )
+    if not profile_lock.acquire(blocking=False):
+        return func.HttpResponse(
+            body=json.dumps({"error": "Another request is being profiled"}),
+            mimetype="application/json",
+            status_code=409
+        )
+    stages = {'stack': [], 'timings': []}
+    token = profile_stages.set(stages)
+    profiler = cProfile.Profile()
+    try:
+        with span(name):
+            response = profiler.runcall(handler, req)
+    finally:
+        profile_stages.reset(token)
+        profile_lock.release()
+
+    # Self time of a stage is its wall time minus that of the stages directly inside it
+    self_times = {}
+    for path, seconds in stages['timings']:
+        self_times[path] = self_times.get(path, 0.0) + seconds
+        parent = path.rpartition(';')[0]
+        if parent:
+            self_times[parent] = self_times.get(parent, 0.0) - seconds
+    stats = pstats.Stats(profiler).stats
+    costliest = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:30]
+    stats_path = os.path.join(tempfile.gettempdir(), f'resume-api-profile-{int(time.time() * 1000)}.pstats')
+    profiler.dump_stats(stats_path)
+    log_event(logging.INFO, 'request_profiled', path=stats_path)
+    return func.HttpResponse(
+        body=json.dumps({
+            "status": response.status_code,
+            "stages": [{"stage": path, "ms": round(seconds * 1000, 3)} for path, seconds in stages['timings']],
+            "folded": "\n".join(f"{path} {max(0, round(seconds * 1e6))}" for path, seconds in self_times.items()),
+            "functions": [{
+                "function": f"{filename}:{line}({function})",
+                "calls": calls,
+                "ownMs": round(own * 1000, 3),
+                "cumulativeMs": round(cumulative * 1000, 3)
+            } for (filename, line, function), (_, calls, own, cumulative, _) in costliest],
+            "pstats": stats_path
+        }, indent=4),
+        mimetype="application/json",
+        status_code=200
+    )
+
+@app.function_name("GetStaticAsset")
+@app.route("static/{name}", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
+def static_asset(req: func.HttpRequest) -> func.HttpResponse:
+    asset = ASSETS.get(req.route_params.get('name'))
+    if asset is None:
+        return func.HttpResponse(status_code=404)
+    body, mimetype = asset
+    # The name changes whenever the content does, so a cached copy never needs revalidating
+    return compressed_response(req, ('asset', req.route_params['name']), body, mimetype,
+                               headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+@app.function_name("IngestResumes")
+@app.route("resumes", methods=["POST"], auth_level=func.AuthLevel.FUNCTION)
+def ingest_resumes(req: func.HttpRequest, context: func.Context = None) -> func.HttpResponse:
+    start_request_context(req.headers, context)
+
+    if container is None:
+        return func.HttpResponse(
+            body=json.dumps({"error": "Resumes cannot be ingested while serving from a snapshot"}),
+            mimetype="application/json",
+            status_code=409
+        )
+    if len(req.get_body()) > INGEST_MAX_BYTES:
+        return func.HttpResponse(
+            body=json.dumps({"error": f"Request body is larger than {INGEST_MAX_BYTES} bytes"}),
+            mimetype="application/json",
+            status_code=413
+        )
+    try:
+        payload = req.get_json()
+    except ValueError:
+        payload = None
+    # Body: {"id": "json", "resumes": {"en": {...JSON Resume...}, "fr": {...}}}
+    if not isinstance(payload, dict) or not isinstance(payload.get('id'), str) or not payload['id'] \
+            or not isinstance(payload.get('resumes'), dict) or not payload['resumes']:
+        return func.HttpResponse(
+            body=json.dumps({"error": "Body must be {\"id\": \"...\", \"resumes\": {\"<lang>\": <JSON Resume>, ...}}"}),
+            mimetype="application/json",
+            status_code=400
+        )
+
+    # Validate every language before writing any, so a bad upload changes nothing
+    errors = {}
+    for lang, resume in payload['resumes'].items():
+        problems = validate_resume(resume) if isinstance(resume, dict) else ['(root): resume must be an object']
+        if problems:
+            errors[lang] = problems
+    if errors:
+        return func.HttpResponse(
+            body=json.dumps({"error": "Schema validation failed", "details": errors}),
+            mimetype="application/json",
+            status_code=400
+        )
+
+    documents = [normalize_resume(payload['id'], lang, resume) for lang, resume in payload['resumes'].items()]
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(INGEST_CONCURRENCY, len(documents)))) as pool:
+        # Each upsert runs in a copy of the request's context, so it keeps the deadline, the
+        # correlation fields and the parent span
+        futures = {document['lang']: pool.submit(contextvars.copy_context().run, store_resume, document) for document in documents}
+        for lang, future in futures.items():
+            try:
+                future.result()
+                results[lang] = "stored"
+            except Exception as e:
+                log_event(logging.ERROR, 'resume_ingest_failed', id=payload['id'], lang=lang, error=e)
+                results[lang] = "failed"
+
+    failed = sum(1 for result in results.values() if result != "stored")
+    log_event(logging.INFO, 'resumes_ingested', id=payload['id'], stored=len(results) - failed, failed=failed)
+    return func.HttpResponse(
+        body=json.dumps({"id": payload['id'], "results": results}),
+        mimetype="application/json",
+        status_code=500 if failed == len(results) else 207 if failed else 200
+    )
+
+# Default and maximum time range served by visitorstats for each granularity
+STATS_RANGES = {
+    'minute': (timedelta(hours=1), timedelta(days=1)),
+    'hour': (timedelta(days=1), timedelta(days=31)),
+    'day': (timedelta(days=30), timedelta(days=366)),
+}
+
+@app.function_name("GetVisitorStats")
+@app.route("visitorstats", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
+def visitor_stats(req: func.HttpRequest, context: func.Context = None) -> func.HttpResponse:
+    start_request_context(req.headers, context)
+
+    granularity = req.params.get('granularity', 'hour')
+    if granularity not in STATS_RANGES:
+        return func.HttpResponse(
+            body=json.dumps({"error": "granularity must be minute, hour or day"}),
+            mimetype="application/json",
+            status_code=400
+        )
+    default_range, max_range = STATS_RANGES[granularity]
+    try:
+        end = datetime.fromisoformat(req.params['to'].replace('Z', '+00:00')) if req.params.get('to') else datetime.now(timezone.utc)
+        start = datetime.fromisoformat(req.params['from'].replace('Z', '+00:00')) if req.params.get('from') else end - default_range
+    except ValueError:
+        return func.HttpResponse(
+            body=json.dumps({"error": "from and to must be ISO 8601 timestamps"}),
+            mimetype="application/json",
+            status_code=400
+        )
+    # Buckets are named in UTC, so naive timestamps are taken as UTC and offsets are converted
+    start = start.replace(tzinfo=start.tzinfo or timezone.utc).astimezone(timezone.utc)
+    end = end.replace(tzinfo=end.tzinfo or timezone.utc).astimezone(timezone.utc)
+    if start > end or end - start > max_range:
+        return func.HttpResponse(
+            body=json.dumps({"error": f"from must be before to and at most {max_range.days or 1} days apart"}),
+            mimetype="application/json",
+            status_code=400
+        )
+
+    if container is None:
+        return func.HttpResponse(
+            body=json.dumps({"error": "Visitor statistics are not available from a snapshot"}),
+            mimetype="application/json",
+            status_code=404
+        )
+
+    wait = rate_limit_wait(req.headers)
+    if wait:
+        log_event(logging.WARNING, 'rate_limited', client=client_key(req.headers))
+        return too_many_requests(wait)
+
+    release = admit()
+    if release is None:
+        return overloaded()
+    try:
+        series = cosmos_breaker.call(query_visitor_stats, granularity, start, end)
+    except CircuitOpenError:
+        return unavailable()
+    except Exception as e:
+        log_event(logging.ERROR, 'visitor_stats_failed', error=e)
+        return func.HttpResponse(
+            body=json.dumps({"error": "Internal server error"}),
+            mimetype="application/json",
+            status_code=500
+        )
+    finally:
+        release()
+
+    return func.HttpResponse(
+        body=json.dumps({
+            "granularity": granularity,
+            "from": start.isoformat().replace('+00:00', 'Z'),
+            "to": end.isoformat().replace('+00:00', 'Z'),
+            "total": sum(point['count'] for point in series),
+            "series": series
+        }),
+        mimetype="application/json",
+        status_code=200
+    )
+
+@app.function_name("SearchResume")
+@app.route("search", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
+def search_resume(req: func.HttpRequest, context: func.Context = None) -> func.HttpResponse:
+    start_request_context(req.headers, context)
+
+    resume_id = req.params.get('id')
+    lang = req.params.get('lang')
+    query = req.params.get('q', '')
+    try:
+        limit = min(int(req.params.get('limit', '10')), SEARCH_MAX_RESULTS)
+    except ValueError:
+        limit = 0
+    if not resume_id or not lang or not SEARCH_TOKEN.search(query) or limit < 1:
+        return func.HttpResponse(
+            body=json.dumps({"error": f"id, lang and q are required, limit must be 1 to {SEARCH_MAX_RESULTS}"}),
+            mimetype="application/json",
+            status_code=400
+        )
+
+    wait = rate_limit_wait(req.headers)
+    if wait:
+        log_event(logging.WARNING, 'rate_limited', client=client_key(req.headers))
+        return too_many_requests(wait)
+
+    # The background refresh keeps the last good copy current, so a search only reaches
+    # Cosmos the first time a resume is seen by this worker
+    resume_data = None
+    if BACKGROUND_REFRESH_SECONDS > 0:
+        with last_good_lock:
+            resume_data = last_good_resumes.get((resume_id, lang, None))
+        # Searching counts as reading the copy, so the refresh keeps it current
+        mark_requested((resume_id, lang, None))
+    if resume_data is None:
+        release = admit()
+        if release is None:
+            return overloaded()
+        try:
+            resume_data, _ = get_resume(resume_id, lang)
+        except CircuitOpenError:
+            return unavailable()
+        except Exception as e:
+            log_event(logging.ERROR, 'resume_read_failed', id=resume_id, lang=lang, error=e)
+            return func.HttpResponse(
+                body=json.dumps({"error": "Internal server error"}),
+                mimetype="application/json",
+                status_code=500
+            )
+        finally:
+            release()
+    if resume_data is None:
+        return func.HttpResponse(
+            body=json.dumps({"error": "Resume not found"}),
+            mimetype="application/json",
+            status_code=404
+        )
+
+    with span('search', **{'resume.lang': lang}):
+        total, results = search_index(resume_id, lang, resume_data).search(query, limit)
+    log_event(logging.INFO, 'resume_searched', id=resume_id, lang=lang, query=query, total=total)
+    return func.HttpResponse(
+        body=json.dumps({"id": resume_id, "lang": lang, "query": query, "total": total, "results": results}),
+        mimetype="application/json",
+        status_code=200
+    )
+
+@app.function_name("VisitorCount")
+@app.route("visitorcount", methods=["GET", "POST"], auth_level=func.AuthLevel.ANONYMOUS)
+def visitor_count_route(req: func.HttpRequest, context: func.Context = None) -> func.HttpResponse:
+    start_request_context(req.headers, context)
+
+    wait = rate_limit_wait(req.headers)
+    if wait:
+        log_event(logging.WARNING, 'rate_limited', client=client_key(req.headers))
+        return too_many_requests(wait)
+
+    # A fresh count, and for POST a visitor already counted, is answered from memory and skips the limiter
+    fingerprint = visitor_fingerprint(req.headers)
+    if count_is_fresh() and (req.method != 'POST' or visitor_counted(fingerprint)):
+        release = lambda: None
+    else:
+        release = admit()
+    if release is None:
+        return overloaded()
+    try:
+        # GET reads the count, POST records a visit first (once per client within the dedup window)
+        if req.method == 'POST':
+            increment_visitor_count(fingerprint)
+        visitor_count, count_stale = get_visitor_count()
+    finally:
+        release()
+    headers = stale_headers(False, count_stale)
+    headers['Cache-Control'] = 'no-store'
+    return func.HttpResponse(
+        body=json.dumps({"visitorCount": visitor_count}),
+        mimetype="application/json",
+        status_code=200,
+        headers=headers
+    )
+
+
+# Streaming responses need the HTTP streams extension (azurefunctions-extensions-http-fastapi)
+# and the PYTHON_ENABLE_INIT_INDEXING app setting, so the route is only registered when enabled
+if STREAMING_ENABLED:
+    from azurefunctions.extensions.http.fastapi import Request, StreamingResponse
+    from starlette.background import BackgroundTask
+
+    @app.function_name("StreamResumeData")
+    @app.route("getresumedata/stream", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
+    async def stream_resume(req: Request) -> StreamingResponse:
+        start_request_context(req.headers)
+
+        resume_id = req.query_params.get('id')
+        langs = [l.strip() for l in (req.query_params.get('lang') or '').split(',') if l.strip()]
+        filter_by = req.query_params.get('filter')
+        theme = req.query_params.get('theme')
+
+        if not resume_id or not langs:
+            return StreamingResponse(
+                iter([json.dumps({"error": "Both id and lang are required"})]),
+                media_type="application/json",
+                status_code=400
+            )
+
+        wait = rate_limit_wait(req.headers)
+        if wait:
+            log_event(logging.WARNING, 'rate_limited', client=client_key(req.headers))
+            return StreamingResponse(
+                iter([json.dumps({"error": "Too many requests"})]),
+                media_type="application/json",
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+
+        # Never wait for a slot here, blocking would stall the event loop for every stream
+        release = admit(wait=False)
+        if release is None:
+            log_event(logging.WARNING, 'request_shed', id=resume_id, lang=','.join(langs))
+            return as_stream(overloaded())
+        release = release_once(release)
+        try:
+            # The single-language fetch and the counter calls block, so they run off the event loop
+            return await asyncio.to_thread(stream_admitted, resume_id, langs, filter_by, theme, release,
+                                           visitor_fingerprint(req.headers))
+        except BaseException:
+            release()
+            raise
+
+    # Function to send a response built for the regular routes from a streaming route
+    def as_stream(response):
+        return StreamingResponse(
+            iter([response.get_body()]),
+            media_type=response.mimetype,
+            status_code=response.status_code,
+            headers=dict(response.headers)
+        )
+
+    # Function to make an admission release safe to call more than once
+    def release_once(release):
+        pending = threading.Lock()
+
+        def release_now():
+            if pending.acquire(blocking=False):
+                release()
+        return release_now
+
+    # Generator that passes chunks through and gives the admission slot back as soon as the body is done
+    def release_after(release, chunks):
+        try:
+            yield from chunks
+        finally:
+            release()
+
+    # Function to build the streaming response. Error bodies give the admission slot back before they are
+    # returned. Starlette never starts the body of a client that disconnected first, and a generator that
+    # never started never runs its finally, so the 200 body also releases from a background task and,
+    # for disconnects that skip the background task too, when the body is garbage collected
+    def stream_admitted(resume_id, langs, filter_by, theme, release, fingerprint):
+        # A single language keeps the same body as getresumedata; a comma separated list
+        # exports every language, keyed by lang, fetching each one as the stream reaches it
+        resume_stale = False
+        stale_langs = []
+        if len(langs) == 1:
+            try:
+                resume_data, resume_stale = get_resume(resume_id, langs[0], filter_by)
+            except CircuitOpenError:
+                release()
+                log_event(logging.ERROR, 'resume_unavailable', id=resume_id, lang=langs[0])
+                return as_stream(unavailable())
+            except Exception as e:
+                release()
+                log_event(logging.ERROR, 'resume_read_failed', id=resume_id, lang=langs[0], error=e)
+                return StreamingResponse(
+                    iter([json.dumps({"error": "Internal server error"})]),
+                    media_type="application/json",
+                    status_code=500
+                )
+            if resume_data is None:
+                release()
+                log_event(logging.ERROR, 'resume_not_found', id=resume_id, lang=langs[0])
+                return StreamingResponse(
+                    iter([json.dumps({"error": "Resume not found"})]),
+                    media_type="application/json",
+                    status_code=404
+                )
+            data = shape_resume(resume_data, theme)
+        else:
+            data = LazySections((lang, lambda lang=lang: export_resume(resume_id, lang, filter_by, theme, stale_langs)) for lang in langs)
+
+        increment_visitor_count(fingerprint)
+        visitor_count, count_stale = get_visitor_count()
+
+        envelope = build_envelope(visitor_count, data)
+        if len(langs) > 1:
+            # Headers are gone before the languages are fetched, so the ones served from last good
+            # copies are listed in the body, after the data
+            envelope = LazySections([(key, lambda value=value: value) for key, value in envelope.items()]
+                                    + [('staleLanguages', lambda: stale_langs)])
+
+        # Starlette runs plain generators in its thread pool, so the blocking Cosmos
+        # reads inside LazySections never stall the event loop
+        body = release_after(release, iter_json(envelope))
+        weakref.finalize(body, release)
+        return StreamingResponse(
+            body,
+            media_type="application/json",
+            status_code=200,
+            headers=stale_headers(resume_stale, count_stale),
+            background=BackgroundTask(release)
+        )
+
+    # Function to read the count for the broadcaster, reusing a count this worker learned within the last interval
+    def broadcast_count():
+        if time.monotonic() - last_good_count_at <= COUNT_STREAM_INTERVAL_SECONDS:
+            return last_good_count
+        count = cosmos_breaker.call(query_visitor_count)
+        remember_count(count)
+        return count
+
+    # One ticker per worker reads the count once per interval and wakes every connected client when it
+    # changes, so Cosmos reads stay flat however many clients are watching. It stops with the last client
+    class CountBroadcaster:
+        def __init__(self):
+            self.count = None
+            self.changed = None
+            self.clients = 0
+            self.task = None
+
+        def subscribe(self):
+            self.clients += 1
+            if self.changed is None:
+                self.changed = asyncio.Event()
+            if self.task is None:
+                self.task = asyncio.ensure_future(self.tick())
+
+        def unsubscribe(self):
+            self.clients -= 1
+
+        async def tick(self):
+            # The task inherited the first client's context; its reads belong to no request deadline
+            request_deadline.set(None)
+            try:
+                while self.clients > 0:
+                    try:
+                        count = await asyncio.to_thread(broadcast_count)
+                    except Exception as e:
+                        log_event(logging.WARNING, 'visitor_count_broadcast_failed', error=e)
+                        count = self.count
+                    if count != self.count:
+                        self.count = count
+                        changed, self.changed = self.changed, asyncio.Event()
+                        changed.set()
+                    await asyncio.sleep(COUNT_STREAM_INTERVAL_SECONDS)
+            finally:
+                self.task = None
+
+    count_broadcaster = CountBroadcaster()
+
+    # Server-Sent Events carrying the count whenever it changes. Comments keep idle proxies from closing
+    # the connection, and the stream ends after COUNT_STREAM_MAX_SECONDS so a host never holds it forever;
+    # EventSource reconnects by itself and sends Last-Event-ID, so an unchanged count is not repeated
+    async def count_events(last_event_id):
+        count_broadcaster.subscribe()
+        try:
+            yield f'retry: {int(COUNT_STREAM_INTERVAL_SECONDS * 1000)}\n\n'
+            sent = last_event_id
+            closes_at = time.monotonic() + COUNT_STREAM_MAX_SECONDS
+            while time.monotonic() < closes_at:
+                changed = count_broadcaster.changed
+                count = count_broadcaster.count
+                if count is not None and str(count) != sent:
+                    sent = str(count)
+                    yield f'id: {count}\nevent: visitorCount\ndata: {json.dumps({"visitorCount": count})}\n\n'
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=min(15, max(0.0, closes_at - time.monotonic())))
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+        finally:
+            count_broadcaster.unsubscribe()
+
+    @app.function_name("StreamVisitorCount")
+    @app.route("visitorcount/stream", methods=["GET"], auth_level=func.AuthLevel.ANONYMOUS)
+    async def stream_visitor_count(req: Request) -> StreamingResponse:
+        start_request_context(req.headers)
+
+        wait = rate_limit_wait(req.headers)
+        if wait:
+            log_event(logging.WARNING, 'rate_limited', client=client_key(req.headers))
+            return StreamingResponse(
+                iter([json.dumps({"error": "Too many requests"})]),
+                media_type="application/json",
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+        if count_broadcaster.clients >= COUNT_STREAM_MAX_CLIENTS:
+            return StreamingResponse(
+                iter([json.dumps({"error": "Server busy, try again shortly"})]),
+                media_type="application/json",
+                status_code=503,
+                headers={"Retry-After": str(math.ceil(COUNT_STREAM_INTERVAL_SECONDS))}
+            )
+
+        return StreamingResponse(
+            count_events(req.headers.get('last-event-id')),
+            media_type="text/event-stream",
+            status_code=200,
+            headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+        )
@@ -0,0 +1,85 @@
+// Dark Mode Toggle Function
+function toggleDarkMode() {
+    document.body.classList.toggle('dark-mode');
+    document.querySelectorAll('.navbar').forEach(el => el.classList.toggle('dark-mode'));
+    document.querySelectorAll('.navbar a').forEach(a => a.classList.toggle('dark-mode'));
+    document.querySelector('.hero_area').classList.toggle('dark-mode');
+    document.querySelector('.hero_area .btn').classList.toggle('dark-mode');
+    document.querySelector('.service_section').classList.toggle('dark-mode');
+    document.querySelectorAll('.service_section .col-md-6 > div').forEach(div => div.classList.toggle('dark-mode'));
+    document.querySelector('#acknowledgments').classList.toggle('dark-mode'); // Toggle dark mode for acknowledgments section
+    document.querySelectorAll('#acknowledgments .container').forEach(container => container.classList.toggle('dark-mode')); // Toggle dark mode for containers in acknowledgments section
+    document.querySelector('.footer').classList.toggle('dark-mode');
+    document.querySelector('.small-round-button').classList.toggle('dark-mode');
+}
+
+// Acknowledgments Slideshow Function
+document.addEventListener('DOMContentLoaded', function () {
+    const containers = document.querySelectorAll('#acknowledgments .container');
+    const indicatorsContainer = document.querySelector('#acknowledgments .btn-group');
+    let index = 0;
+
+    function showContainer(idx) {
+        containers.forEach(container => {
+            container.style.display = 'none';
+        });
+
+        containers[idx].style.display = 'block';
+        updateIndicators(idx);
+    }
+
+    function updateIndicators(currentIndex) {
+        const indicators = Array.from(indicatorsContainer.children);
+
+        indicators.forEach((indicator, idx) => {
+            if (idx === currentIndex) {
+                indicator.classList.add('active');
+            } else {
+                indicator.classList.remove('active');
+            }
+        });
+    }
+
+    function goToContainer(idx) {
+        index = idx;
+        showContainer(index);
+    }
+
+    // Create indicators
+    containers.forEach((_, idx) => {
+        const indicator = document.createElement('div');
+        indicator.classList.add('indicator');
+        if (idx === 0) {
+            indicator.classList.add('active');
+        }
+        indicator.addEventListener('click', () => goToContainer(idx));
+        indicatorsContainer.appendChild(indicator);
+    });
+
+    // Automatic slideshow
+    function startSlideshow() {
+        showContainer(index);
+        index = (index + 1) % containers.length;
+        setTimeout(startSlideshow, 4000); // 4000 milliseconds = 4 seconds
+    }
+
+    // Start the slideshow
+    startSlideshow();
+});
+
+// Count this visit and show the updated visitor count
+async function countVisit() {
+    try {
+        const response = await fetch('https://azureresumeapp.azurewebsites.net/api/visitorcount', {
+            method: 'POST'
+        });
+        const data = await response.json();
+        document.getElementById('visitorCount').textContent = data.visitorCount;
+    } catch (error) {
+        console.error('Error counting visit:', error);
+        document.getElementById('visitorCount').textContent = 'Error loading count';
+    }
+}
+
+// Call the function to count the visit and show the visitor count when the page loads
+document.addEventListener('DOMContentLoaded', countVisit);
@@ -0,0 +1,3 @@
+from snapshot_env import use_snapshot_mode
+
+use_snapshot_mode()
@@ -0,0 +1,17 @@
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# function_app reads its settings at import time. Snapshot mode lets it load without a Cosmos account:
+# the tests and benchmarks only exercise in-process logic, never a database. Call this before importing it
+def use_snapshot_mode():
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as snapshot:
+        snapshot.write(json.dumps({'id': 'visitor_count', 'visitorCount': 0}) + '\n')
+    os.environ.setdefault('RESUME_DATA_SOURCE', 'snapshot')
+    os.environ.setdefault('RESUME_SNAPSHOT_PATH', snapshot.name)
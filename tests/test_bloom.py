@@ -0,0 +1,80 @@
+import math
+
+import pytest
+
+from function_app import RotatingBloomFilter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize('capacity, error_rate', [(10000, 0.01), (10000, 0.001), (1000, 0.05)])
+def test_sizing_follows_capacity_and_error_rate(capacity, error_rate):
+    bloom = RotatingBloomFilter(capacity, error_rate, 60)
+    expected_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+    assert bloom.bits == expected_bits
+    assert bloom.hashes == round(expected_bits / capacity * math.log(2))
+    # Two filters of m bits each
+    assert bloom.size == 2 * ((expected_bits + 7) // 8)
+
+
+def test_memory_grows_with_a_lower_error_rate():
+    assert RotatingBloomFilter(10000, 0.001, 60).size > RotatingBloomFilter(10000, 0.01, 60).size
+
+
+@pytest.mark.parametrize('capacity, error_rate', [(10000, 0.01), (10000, 0.001), (2000, 0.05)])
+def test_false_positive_rate_at_capacity_matches_configuration(capacity, error_rate):
+    bloom = RotatingBloomFilter(capacity, error_rate, 60)
+    for i in range(capacity):
+        bloom.add(f'member-{i}')
+    probes = 100000
+    false_positives = sum(f'stranger-{i}' in bloom for i in range(probes))
+    # Observed rate within 50% of the configured one (binomial noise is far smaller at these sizes)
+    assert false_positives / probes <= error_rate * 1.5
+
+
+def test_members_are_never_missed():
+    bloom = RotatingBloomFilter(1000, 0.01, 60)
+    for i in range(1000):
+        bloom.add(f'member-{i}')
+    assert all(f'member-{i}' in bloom for i in range(1000))
+
+
+def test_membership_check_does_not_insert():
+    bloom = RotatingBloomFilter(1000, 0.01, 60)
+    assert 'visitor' not in bloom
+    assert 'visitor' not in bloom
+    bloom.add('visitor')
+    assert 'visitor' in bloom
+
+
+def test_item_survives_one_rotation_and_expires_after_two():
+    clock = FakeClock()
+    bloom = RotatingBloomFilter(100, 0.01, 60, clock=clock)
+    bloom.add('visitor')
+    clock.now = 29
+    assert 'visitor' in bloom
+    # First rotation moves it to the previous filter
+    clock.now = 31
+    assert 'visitor' in bloom
+    # Second rotation drops it
+    clock.now = 62
+    assert 'visitor' not in bloom
+
+
+def test_long_silence_clears_both_filters():
+    clock = FakeClock()
+    bloom = RotatingBloomFilter(100, 0.01, 60, clock=clock)
+    bloom.add('visitor')
+    clock.now = 45
+    assert 'visitor' in bloom
+    bloom.add('later')
+    # More than a whole window after the last rotation, nothing is remembered
+    clock.now = 45 + 61
+    assert 'visitor' not in bloom
+    assert 'later' not in bloom
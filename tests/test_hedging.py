@@ -0,0 +1,76 @@
+import threading
+import time
+
+from function_app import HedgedReader
+
+
+# Local stand-in for the resume query: the primary read sleeps primary_delay, a hedge answers fast
+class StandIn:
+    def __init__(self, primary_delay, hedge_delay=0.0):
+        self.primary_delay = primary_delay
+        self.hedge_delay = hedge_delay
+        self.hedges = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, hedge):
+        if hedge:
+            with self.lock:
+                self.hedges += 1
+            time.sleep(self.hedge_delay)
+            return 'hedge'
+        time.sleep(self.primary_delay)
+        return 'primary'
+
+
+def warmed_reader(budget_ratio, percentile=0.95, latency=0.001):
+    reader = HedgedReader(percentile, 0.005, budget_ratio, max_workers=8)
+    for _ in range(256):
+        reader.observe(latency)
+    return reader
+
+
+def test_slow_primary_returns_the_hedge_result():
+    reader = warmed_reader(budget_ratio=1.0)
+    stand_in = StandIn(primary_delay=0.5)
+    started = time.monotonic()
+    assert reader.read(stand_in) == 'hedge'
+    assert time.monotonic() - started < 0.3
+    assert stand_in.hedges == 1
+
+
+def test_fast_primary_is_not_hedged():
+    reader = warmed_reader(budget_ratio=1.0, latency=0.05)
+    stand_in = StandIn(primary_delay=0.001)
+    assert reader.read(stand_in) == 'primary'
+    assert stand_in.hedges == 0
+
+
+def test_no_hedge_before_min_samples():
+    reader = HedgedReader(0.95, 0.001, 1.0, max_workers=8)
+    stand_in = StandIn(primary_delay=0.01)
+    for _ in range(HedgedReader.MIN_SAMPLES - 1):
+        assert reader.read(stand_in) == 'primary'
+    assert stand_in.hedges == 0
+
+
+def test_failed_primary_falls_back_to_hedge():
+    reader = warmed_reader(budget_ratio=1.0)
+
+    def read(hedge):
+        if hedge:
+            return 'hedge'
+        time.sleep(0.05)
+        raise RuntimeError('primary failed')
+
+    assert reader.read(read) == 'hedge'
+
+
+def test_token_budget_limits_hedges_to_the_ratio():
+    budget_ratio = 0.05
+    reads = 100
+    # The median stays at the warm-up latency, so every primary is slow enough to hedge
+    reader = warmed_reader(budget_ratio, percentile=0.5)
+    stand_in = StandIn(primary_delay=0.02)
+    for _ in range(reads):
+        reader.read(stand_in)
+    assert 1 <= stand_in.hedges <= budget_ratio * reads